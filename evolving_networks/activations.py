@@ -25,6 +25,8 @@
 import math
 import random
 
+import numpy as np
+
 from evolving_networks.errors import InvalidActivationError
 
 
@@ -96,29 +98,101 @@ def relu_activation(x):
     return max(0.0, x)  # [16]
 
 
+def batch_identity_activation(x):
+    return x
+
+
+def batch_hard_tanh_activation(x):
+    return np.clip(x, -1.0, 1.0)  # [1]
+
+
+def batch_relu6_activation(x):
+    return np.clip(x, 0.0, 6.0)  # [2]
+
+
+def batch_elu_activation(x, alpha=1.0):
+    return np.maximum(0.0, x) + np.minimum(0.0, alpha * (np.exp(x) - 1.0))  # [3]
+
+
+def batch_selu_activation(x, alpha=1.6732632423543772848170429916717,
+                          scale=1.0507009873554804934193349852946):  # [3], [4]
+    return scale * batch_elu_activation(x, alpha)
+
+
+def batch_leaky_relu_activation(x, negative_slope=0.01):
+    return np.maximum(0.0, x) + (negative_slope * np.minimum(0.0, x))  # [5]
+
+
+def batch_prelu_activation(x, init=0.25):
+    return np.maximum(0.0, x) + (init * np.minimum(0.0, x))  # [6]
+
+
+def batch_rrelu_activation(x, lower=0.125, upper=0.3333333333333333):
+    return np.maximum(0.0, x) + (np.random.uniform(lower, upper, np.shape(x)) * np.minimum(0.0, x))  # [7]
+
+
+def batch_log_sigmoid_activation(x):
+    return np.log(1.0 / (1.0 + np.exp(-1.0 * x)))  # [8]
+
+
+def batch_hard_shrink_activation(x, _lambda=0.5):
+    return np.where(np.abs(x) > _lambda, x, 0.0)  # [9]
+
+
+def batch_tanh_shrink_activation(x):
+    return x - batch_tanh_activation(x)  # [10]
+
+
+def batch_soft_sign_activation(x):
+    return x / (1.0 + np.abs(x))  # [11]
+
+
+def batch_soft_plus_activation(x, beta=1.0, threshold=20.0):
+    soft = (1.0 / beta) * np.log(1 + np.exp(beta * np.minimum(x, threshold)))
+    return np.where(x > threshold, x, soft)  # [12]
+
+
+def batch_soft_shrink_activation(x, _lambda=0.5):
+    return np.where(x > _lambda, x - _lambda, np.where(x < (-1.0 * _lambda), x + _lambda, 0.0))  # [13]
+
+
+def batch_tanh_activation(z):
+    return np.tanh(z)  # [14]
+
+
+def batch_sigmoid_activation(x):
+    return 1.0 / (1.0 + np.exp(-1.0 * x))  # [15]
+
+
+def batch_relu_activation(x):
+    return np.maximum(0.0, x)  # [16]
+
+
 class Activations(object):
     def __init__(self):
         self.functions = {}
-        self._add('identity', identity_activation)
-        self._add('hardtanh', hard_tanh_activation)
-        self._add('relu6', relu6_activation)
-        self._add('elu', elu_activation)
-        self._add('selu', selu_activation)
-        self._add('lrelu', leaky_relu_activation)
-        self._add('prelu', prelu_activation)
-        self._add('rrelu', rrelu_activation)
-        self._add('logsigmoid', log_sigmoid_activation)
-        self._add('hardshrink', hard_shrink_activation)
-        self._add('tanhshirnk', tanh_shrink_activation)
-        self._add('softsign', soft_sign_activation)
-        self._add('softplus', soft_plus_activation)
-        self._add('softshrink', soft_shrink_activation)
-        self._add('tanh', tanh_activation)
-        self._add('sigmoid', sigmoid_activation)
-        self._add('relu', relu_activation)
-
-    def _add(self, name, func):
+        self.batch_functions = {}
+        self._add('identity', identity_activation, batch_identity_activation)
+        self._add('hardtanh', hard_tanh_activation, batch_hard_tanh_activation)
+        self._add('relu6', relu6_activation, batch_relu6_activation)
+        self._add('elu', elu_activation, batch_elu_activation)
+        self._add('selu', selu_activation, batch_selu_activation)
+        self._add('lrelu', leaky_relu_activation, batch_leaky_relu_activation)
+        self._add('prelu', prelu_activation, batch_prelu_activation)
+        self._add('rrelu', rrelu_activation, batch_rrelu_activation)
+        self._add('logsigmoid', log_sigmoid_activation, batch_log_sigmoid_activation)
+        self._add('hardshrink', hard_shrink_activation, batch_hard_shrink_activation)
+        self._add('tanhshirnk', tanh_shrink_activation, batch_tanh_shrink_activation)
+        self._add('softsign', soft_sign_activation, batch_soft_sign_activation)
+        self._add('softplus', soft_plus_activation, batch_soft_plus_activation)
+        self._add('softshrink', soft_shrink_activation, batch_soft_shrink_activation)
+        self._add('tanh', tanh_activation, batch_tanh_activation)
+        self._add('sigmoid', sigmoid_activation, batch_sigmoid_activation)
+        self._add('relu', relu_activation, batch_relu_activation)
+
+    def _add(self, name, func, batch_func):
         self.functions[name] = func
+        self.batch_functions[name] = batch_func
 
     def get(self, name):
         f = self.functions.get(name)
@@ -126,5 +200,11 @@ class Activations(object):
             raise InvalidActivationError("NO SUCH ACTIVATION FUNCTION FOUND [{}]".format(name))
         return f
 
+    def get_batch(self, name):
+        f = self.batch_functions.get(name)
+        if f is None:
+            raise InvalidActivationError("NO SUCH ACTIVATION FUNCTION FOUND [{}]".format(name))
+        return f
+
     def is_valid(self, name):
         return name in self.functions
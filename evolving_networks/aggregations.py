@@ -1,6 +1,8 @@
 from functools import reduce
 from operator import mul
 
+import numpy as np
+
 from evolving_networks.errors import InvalidAggregationError
 from evolving_networks.math_util import mean
 
@@ -33,19 +35,50 @@ def mean_aggregation(x):
     return mean(x)
 
 
+# Batch aggregations reduce incoming signals stacked along the leading axis
+def batch_product_aggregation(x):
+    return np.prod(x, axis=0)
+
+
+def batch_max_abs_aggregation(x):
+    return np.take_along_axis(x, np.argmax(np.abs(x), axis=0)[np.newaxis], axis=0)[0]
+
+
+def batch_min_abs_aggregation(x):
+    return np.take_along_axis(x, np.argmin(np.abs(x), axis=0)[np.newaxis], axis=0)[0]
+
+
+def batch_sum_aggregation(x):
+    return np.sum(x, axis=0)
+
+
+def batch_max_aggregation(x):
+    return np.max(x, axis=0)
+
+
+def batch_min_aggregation(x):
+    return np.min(x, axis=0)
+
+
+def batch_mean_aggregation(x):
+    return np.mean(x, axis=0)
+
+
 class Aggregations(object):
     def __init__(self):
         self.functions = {}
-        self._add('product', product_aggregation)
-        self._add('sum', sum_aggregation)
-        self._add('max', max_aggregation)
-        self._add('min', min_aggregation)
-        self._add('maxabs', max_abs_aggregation)
-        self._add('minabs', min_abs_aggregation)
-        self._add('mean', mean_aggregation)
-
-    def _add(self, name, func):
+        self.batch_functions = {}
+        self._add('product', product_aggregation, batch_product_aggregation)
+        self._add('sum', sum_aggregation, batch_sum_aggregation)
+        self._add('max', max_aggregation, batch_max_aggregation)
+        self._add('min', min_aggregation, batch_min_aggregation)
+        self._add('maxabs', max_abs_aggregation, batch_max_abs_aggregation)
+        self._add('minabs', min_abs_aggregation, batch_min_abs_aggregation)
+        self._add('mean', mean_aggregation, batch_mean_aggregation)
+
+    def _add(self, name, func, batch_func):
         self.functions[name] = func
+        self.batch_functions[name] = batch_func
 
     def get(self, name):
         f = self.functions.get(name)
@@ -53,5 +86,11 @@ class Aggregations(object):
             raise InvalidAggregationError("NO SUCH AGGREGATION FUNCTION FOUND [{}]".format(name))
         return f
 
+    def get_batch(self, name):
+        f = self.batch_functions.get(name)
+        if f is None:
+            raise InvalidAggregationError("NO SUCH AGGREGATION FUNCTION FOUND [{}]".format(name))
+        return f
+
     def is_valid(self, name):
         return name in self.functions
@@ -12,6 +12,8 @@ class ConfigParameter(object):
         self.default = default
 
     def parse(self, section, config_parser):
+        if self.default is not None and not config_parser.has_option(section, self.name):
+            return self.default
         if self.type == int:
             return config_parser.getint(section, self.name)
         if self.type == bool:
@@ -175,7 +177,10 @@ class DefaultGenomeConfig(object):
                ConfigParameter('single_structural_mutation', bool),
                ConfigParameter('compatibility_disjoint_contribution', float),
                ConfigParameter('compatibility_excess_contribution', float),
-               ConfigParameter('compatibility_weight_contribution', float)]
+               ConfigParameter('compatibility_weight_contribution', float),
+               ConfigParameter('innovation_retention', str, 'global'),
+               ConfigParameter('innovation_archive_size', int, 65536),
+               ConfigParameter('storage', str, 'genome')]
 
     def __init__(self, config_parser=None):
         if config_parser is not None:
@@ -277,7 +282,8 @@ class DefaultNEATConfig(object):
                ConfigParameter('phased_complexity_type', str),
                ConfigParameter('phased_complexity_threshold', float),
                ConfigParameter('phase_fitness_plateau_threshold', int),
-               ConfigParameter('phase_simplification_generations_threshold', int)]
+               ConfigParameter('phase_simplification_generations_threshold', int),
+               ConfigParameter('fitness_memoization', bool, False)]
 
     def __init__(self, config_parser=None):
         if config_parser is not None:
@@ -0,0 +1,84 @@
+import numpy as np
+
+from evolving_networks.activations import Activations
+from evolving_networks.aggregations import Aggregations
+from evolving_networks.phenome.feed_forward import FeedForwardNetwork
+from evolving_networks.phenome.levels import Level
+
+
+class BatchedEvaluator(object):
+    """
+    Evaluates every feed forward genome of a generation on a shared dataset in one vectorized pass.
+    All phenomes are packed into a single value matrix and advanced together, one topological depth level at a time.
+    The fitness function receives outputs shaped (n_genomes, n_samples, n_outputs) and returns n_genomes fitness values.
+    Genomes whose node activations overflow are flagged as damaged.
+    """
+
+    def __init__(self, inputs, fitness_function, chunk_size=4096):
+        self.inputs = np.asarray(inputs, dtype=float)
+        self.fitness_function = fitness_function
+        self.chunk_size = chunk_size
+        self.activations = Activations()
+        self.aggregations = Aggregations()
+        self.evaluations = 0
+
+    def _compile(self, networks):
+        offsets, levels = [], {}
+        nb_slots = 0
+        for network in networks:
+            offsets.append(nb_slots)
+            depth, nodes = [0] * len(network.node_order), network.genome.nodes
+            for (slot, source_slots, weights, bias, response, _, _) in network.program:
+                depth[slot] = 1 + max([depth[s] for s in source_slots], default=0)
+
+                # Nodes without incoming signals keep their zero output
+                if source_slots:
+                    g_node = nodes[network.node_order[slot]]
+                    levels.setdefault(depth[slot], []).append(
+                        (g_node.agg, g_node.act, nb_slots + slot, [nb_slots + s for s in source_slots], weights,
+                         bias, response))
+            nb_slots += len(network.node_order)
+
+        input_slots = np.array([offset + slot for offset, network in zip(offsets, networks) for slot in
+                                network.input_slots], dtype=int)
+        output_slots = np.array([offset + slot for offset, network in zip(offsets, networks) for slot in
+                                 network.output_slots], dtype=int)
+        return nb_slots, offsets, input_slots, output_slots, [Level(levels[d]) for d in sorted(levels)]
+
+    def activate(self, networks):
+        nb_slots, offsets, input_slots, output_slots, levels = self._compile(networks)
+        nb_networks, nb_samples = len(networks), self.inputs.shape[0]
+
+        outputs = np.empty((len(output_slots), nb_samples))
+        damaged = np.zeros(nb_networks, dtype=bool)
+        with np.errstate(all='ignore'):
+            for start in range(0, nb_samples, self.chunk_size):
+                inputs = self.inputs[start:start + self.chunk_size].T
+                values = np.zeros((nb_slots, inputs.shape[1]))
+                values[input_slots] = np.tile(inputs, (nb_networks, 1))
+                for level in levels:
+                    damaged_slots = level.activate(values, self.activations, self.aggregations)
+                    if damaged_slots:
+                        damaged[np.searchsorted(offsets, damaged_slots, side='right') - 1] = True
+                outputs[:, start:start + self.chunk_size] = values[output_slots]
+
+        # Damaged networks report zero outputs as in FeedForwardNetwork.activate
+        outputs = outputs.reshape(nb_networks, -1, nb_samples).transpose(0, 2, 1)
+        outputs[damaged] = 0.0
+        return outputs, damaged
+
+    def evaluate(self, genomes, config):
+        if not genomes:
+            return
+
+        networks = []
+        for g_id, genome in genomes:
+            network = FeedForwardNetwork(genome, config)
+            network.initialize(self.activations, self.aggregations)
+            networks.append(network)
+
+        outputs, damaged = self.activate(networks)
+        for (g_id, genome), fitness, is_damaged in zip(genomes, self.fitness_function(outputs), damaged):
+            genome.fitness = float(fitness)
+            genome.is_damaged = bool(is_damaged)
+        self.evaluations += 1
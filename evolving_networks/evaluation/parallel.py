@@ -0,0 +1,89 @@
+"""
+# ==============
+# References
+# ==============
+
+[1] https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+
+"""
+import concurrent.futures
+import os
+
+from evolving_networks.genome.genome import Genome
+
+# Per worker process state, set once by the pool initializer
+_worker_config = None
+_worker_function = None
+
+
+def _initialize_worker(eval_function, config):
+    global _worker_config, _worker_function
+    _worker_config = config
+    _worker_function = eval_function
+
+
+def _evaluate_chunk(compact_genomes):
+    return [_evaluate_genome(compact_genome) for compact_genome in compact_genomes]
+
+
+def _evaluate_genome(compact_genome):
+    genome = Genome(g_id=None, generation=None, config=_worker_config.genome).from_compact(compact_genome)
+    fitness = _worker_function(genome, _worker_config)
+    return fitness, genome.is_damaged
+
+
+class ParallelEvaluator(object):
+    """
+    Evaluates genomes on a long lived pool of worker processes.
+    The configuration and evaluation function are sent once to every worker when the pool starts, genomes are sent in
+    chunks using their compact encoding. The evaluation function is called as eval_function(genome, config) inside a
+    worker and returns the fitness, it may flag the genome as damaged. Single genomes may be submitted to get a future
+    of their (fitness, is_damaged). The pool is restarted when a different configuration object is passed, call close
+    once evaluation is over.
+    """
+
+    def __init__(self, num_workers=None, eval_function=None, chunk_size=None):
+        self.num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.eval_function = eval_function
+        self.chunk_size = chunk_size
+        self.evaluations = 0
+
+        self._config = None
+        self._executor = None
+
+    def _start(self, config):
+        if self._executor is not None and self._config is config:
+            return
+
+        self.close()
+        self._config = config
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers,
+                                                                initializer=_initialize_worker,
+                                                                initargs=(self.eval_function, config))  # [1]
+
+    def evaluate(self, genomes, config):
+        if not genomes:
+            return
+
+        self._start(config)
+
+        # Few chunks per worker balance uneven evaluation times against per task overhead
+        chunk_size = self.chunk_size or max(1, len(genomes) // (self.num_workers * 4))
+        compact_genomes = [genome.to_compact() for g_id, genome in genomes]
+        chunks = [compact_genomes[i:i + chunk_size] for i in range(0, len(compact_genomes), chunk_size)]
+
+        results = [result for chunk_results in self._executor.map(_evaluate_chunk, chunks) for result in chunk_results]
+        for (g_id, genome), (fitness, is_damaged) in zip(genomes, results):
+            genome.fitness = fitness
+            genome.is_damaged = is_damaged
+        self.evaluations += 1
+
+    def submit(self, genome, config):
+        self._start(config)
+        return self._executor.submit(_evaluate_genome, genome.to_compact())
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._config = None
@@ -0,0 +1,30 @@
+import concurrent.futures
+
+
+class SerialEvaluator(object):
+    """
+    Evaluates genomes one at a time in this process with eval_function(genome, config) returning the fitness.
+    Offers the interface of ParallelEvaluator for evaluation functions too cheap to be sent to worker processes,
+    submitted genomes are evaluated right away and return a completed future of their (fitness, is_damaged).
+    """
+
+    def __init__(self, eval_function=None):
+        self.num_workers = 1
+        self.eval_function = eval_function
+        self.evaluations = 0
+
+    def evaluate(self, genomes, config):
+        for g_id, genome in genomes:
+            genome.fitness = self.eval_function(genome, config)
+        self.evaluations += 1
+
+    def submit(self, genome, config):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result((self.eval_function(genome, config), genome.is_damaged))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        pass
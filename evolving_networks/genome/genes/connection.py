@@ -58,6 +58,11 @@ class Connection(Gene):
             setattr(self, p, result[p])
         return self
 
+    def copy(self):
+        connection = self.__class__()
+        connection.initialize(self.id, self.source_id, self.target_id, self.weight, self.enabled)
+        return connection
+
     def initialize(self, _id, source_id, target_id, weight, enabled, config=None):
         self.id = _id
         self.source_id = source_id
@@ -52,6 +52,11 @@ class Node(Gene):
             setattr(self, p, result[p])
         return self
 
+    def copy(self):
+        node = self.__class__()
+        node.initialize(self.id, self.type, self.bias, self.res, self.act, self.agg)
+        return node
+
     def initialize(self, _id, _type, bias, res, act, agg, config=None):
         self.id = _id
         self.type = _type
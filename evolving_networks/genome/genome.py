@@ -18,24 +18,34 @@ from evolving_networks.configurations.config import DefaultGenomeConfig
 from evolving_networks.errors import InvalidConfigurationError, InvalidConditionalError
 from evolving_networks.genome.genes.connection import Connection
 from evolving_networks.genome.genes.node import Node
+from evolving_networks.genome.innovation import InnovationTracker
 from evolving_networks.math_util import normalize, probabilistic_round
 
+# Combined connection count from which genome distance is computed with NumPy
+_vectorized_distance_size = 512
+
+# Rejection sampling attempts for a new connector before enumerating all possible connectors
+_connector_sampling_attempts = 32
+
 
 class Genome(object):
+    """
+    Genes of nodes and connections are shared copy-on-write between a genome, its clones and its asexual off springs.
+    Objects in nodes and connections may belong to other genomes as well, genes have to be changed through
+    _own_node(n_id) and _own_connection(c_id) which copy shared genes first.
+    """
+
     _params = ['id', 'node_idx_cntr', 'birth_generation', 'fitness', 'adjusted_fitness', 'is_damaged', 'nodes',
-               'connections', '_connectors', '_cyclic_connectors', '_acyclic_connectors', 'node_ids',
-               '_innovation_idx_cntr', '_innovation_archive', 'config']
-    _innovation_archive = {}
-    _innovation_idx = count(0)
-    _innovation_idx_cntr = 0
+               'connections', '_connectors', 'node_ids', 'config']
 
-    def __init__(self, g_id, generation, config):
+    def __init__(self, g_id, generation, config, innovations=None):
         self._node_idx = count(0)
         self.node_idx_cntr = 0
 
         self.id = g_id
         self.config = config
         self.birth_generation = generation
+        self.innovations = innovations
 
         self.nodes = dict()
         self.connections = dict()
@@ -44,10 +54,15 @@ class Genome(object):
         self.is_damaged = False
 
         self._connectors = set()
-        self._cyclic_connectors = set()
-        self._acyclic_connectors = set()
         self.node_ids = {'all': set(), 'input': set(), 'hidden': set(), 'output': set()}
 
+        # Lazily built outgoing adjacency of connectors used for cycle checks, maintained with _connectors once built
+        self._outgoing = None
+
+        # Ids of genes shared with a clone or its parent, copied before their first mutation
+        self._shared_nodes = set()
+        self._shared_connections = set()
+
     @property
     def complexity(self):
         return len(self.connections)
@@ -90,6 +105,12 @@ class Genome(object):
                 return False
         return True
 
+    def __getstate__(self):
+        # Innovation trackers belong to the population and are not pickled along with every genome
+        state = self.__dict__.copy()
+        state['innovations'] = None
+        return state
+
     def to_json(self):
         result = dict()
         for p in self._params:
@@ -97,12 +118,10 @@ class Genome(object):
                 result[p] = {k: v.to_json() for k, v in getattr(self, p).items()}
             elif p == 'connections':
                 result[p] = {k: v.to_json() for k, v in getattr(self, p).items()}
-            elif p in ['_connectors', '_cyclic_connectors', '_acyclic_connectors']:
+            elif p == '_connectors':
                 result[p] = list(getattr(self, p))
             elif p == 'node_ids':
                 result[p] = {k: list(v) for k, v in getattr(self, p).items()}
-            elif p == '_innovation_archive':
-                result[p] = [{'k': list(k), 'v': v} for k, v in getattr(self, p).items()]
             elif p == 'config':
                 result[p] = getattr(self, p).to_json()
             else:
@@ -111,25 +130,88 @@ class Genome(object):
 
     def from_json(self, genome_json):
         result = json.loads(genome_json)
+        self._outgoing = None
+        self._shared_nodes, self._shared_connections = set(), set()
         for p in self._params:
             if p == 'nodes':
                 setattr(self, p, {int(_id): Node().from_json(json_str) for _id, json_str in result[p].items()})
             elif p == 'connections':
                 setattr(self, p, {int(_id): Connection().from_json(json_str) for _id, json_str in result[p].items()})
-            elif p in ['_connectors', '_cyclic_connectors', '_acyclic_connectors']:
+            elif p == '_connectors':
                 setattr(self, p, {tuple(val) for val in result[p]})
             elif p == 'node_ids':
                 setattr(self, p, {k: set(v) for k, v in result[p].items()})
-            elif p == '_innovation_archive':
-                setattr(self, p, {tuple(val['k']): val['v'] for val in result[p]})
             elif p == 'config':
                 setattr(self, p, DefaultGenomeConfig().from_json(result[p]))
             else:
                 setattr(self, p, result[p])
         self._node_idx = count(self.node_idx_cntr + 1)
-        self._innovation_idx = count(self._innovation_idx_cntr + 1)
         return self
 
+    def to_compact(self):
+        """
+        Tuple encoding of the genome without derived state, cheap to pickle between processes
+        :return: (id, birth_generation, fitness, adjusted_fitness, is_damaged, node_idx_cntr, nodes, connections)
+        """
+        nodes = tuple((n.id, n.type, n.bias, n.res, n.act, n.agg) for n in self.nodes.values())
+        connections = tuple((c.id, c.source_id, c.target_id, c.weight, c.enabled) for c in self.connections.values())
+        return (self.id, self.birth_generation, self.fitness, self.adjusted_fitness, self.is_damaged,
+                self.node_idx_cntr, nodes, connections)
+
+    def from_compact(self, compact):
+        (self.id, self.birth_generation, self.fitness, self.adjusted_fitness, self.is_damaged, node_idx_cntr, nodes,
+         connections) = compact
+        self._outgoing = None
+        self._shared_nodes, self._shared_connections = set(), set()
+        for (_id, _type, bias, res, act, agg) in nodes:
+            self._create_node(_id, _type, bias, res, act, agg)
+            self.node_ids['all'].add(_id)
+            self.node_ids[_type].add(_id)
+
+        for (_id, source_id, target_id, weight, enabled) in connections:
+            connection = Connection()
+            connection.initialize(_id, source_id, target_id, weight, enabled)
+            self.connections[_id] = connection
+            self._add_connector(source_id, target_id)
+
+        self._node_idx = count(node_idx_cntr + 1)
+        self.node_idx_cntr = node_idx_cntr
+        return self
+
+    def remap_innovations(self, mapping):
+        """
+        Replaces provisional innovation ids handed out by a forked innovation tracker with merged ones
+        """
+        if not any(c_id in mapping for c_id in self.connections):
+            return
+        connections = dict()
+        for c_id, connection in self.connections.items():
+            if c_id in mapping:
+                connection = self._own_connection(c_id)
+                connection.id = mapping[c_id]
+            connections[connection.id] = connection
+        self.connections = connections
+
+    def structural_fingerprint(self):
+        """
+        Enabled connectors and node functions, equal for genomes sharing the same phenome topology. The sets themselves
+        are used as cache key rather than their hash, so colliding topologies never share an entry.
+        :return: Hashable (connectors, nodes) tuple of frozensets
+        """
+        connectors = frozenset([(c.id, c.source_id, c.target_id) for c in self.connections.values() if c.enabled])
+        nodes = frozenset([(n.id, n.type, n.act, n.agg) for n in self.nodes.values()])
+        return connectors, nodes
+
+    def parameter_fingerprint(self):
+        """
+        Complete phenome definition, equal for genomes expressing the same network
+        :return: Hashable (connections, nodes) tuple of frozensets
+        """
+        connections = frozenset(
+            [(c.id, c.source_id, c.target_id, c.weight) for c in self.connections.values() if c.enabled])
+        nodes = frozenset([(n.id, n.type, n.act, n.agg, n.bias, n.res) for n in self.nodes.values()])
+        return connections, nodes
+
     def distance(self, other_genome, config):
         dist = 0.0
         c1 = config.genome.compatibility_disjoint_contribution
@@ -139,46 +221,75 @@ class Genome(object):
         conn_1_cnt = len(self.connections)
         conn_2_cnt = len(other_genome.connections)
         if conn_1_cnt != 0 and conn_2_cnt != 0:
-            c_list_1 = sorted(list(self.connections.keys()))
-            c_list_2 = sorted(list(other_genome.connections.keys()))
-
-            nb_disjoint, nb_excess = 0, 0
-            excess_threshold = min(max(c_list_1), max(c_list_2))
-            for x in c_list_1:
-                if x not in c_list_2:
-                    if x <= excess_threshold:
-                        nb_disjoint += 1
-                    else:
-                        nb_excess += 1
-            for x in c_list_2:
-                if x not in c_list_1:
-                    if x <= excess_threshold:
-                        nb_disjoint += 1
-                    else:
-                        nb_excess += 1
-
-            dist += (c1 * normalize(0, max(len(c_list_1), len(c_list_2)), nb_disjoint, 0.0, 1.0))
-            dist += (c2 * normalize(0, max(len(c_list_1), len(c_list_2)), nb_excess, 0.0, 1.0))
-        elif conn_1_cnt == 0 and conn_2_cnt == 0:
-            dist += 0.0
-        else:
-            dist += (c2 * 1.0)
-
-        c_dist = 0.0
-        if conn_1_cnt != 0 or conn_2_cnt != 0:
-            matched_connections = list(set(self.connections.keys()) & set(other_genome.connections.keys()))
-            for c_id in matched_connections:
-                c_dist += self.connections[c_id].distance(other_genome.connections[c_id], config.connection)
+            if conn_1_cnt + conn_2_cnt >= _vectorized_distance_size:
+                nb_disjoint, nb_excess, nb_matched, c_dist = self._compare_vectorized(other_genome, config.connection)
+            else:
+                nb_disjoint, nb_excess, nb_matched, c_dist = self._compare(other_genome, config.connection)
 
-            if len(matched_connections) > 0:
-                c_dist = c_dist / len(matched_connections)
+            dist += (c1 * normalize(0, max(conn_1_cnt, conn_2_cnt), nb_disjoint, 0.0, 1.0))
+            dist += (c2 * normalize(0, max(conn_1_cnt, conn_2_cnt), nb_excess, 0.0, 1.0))
+            if nb_matched > 0:
+                dist += (c3 * (c_dist / nb_matched))
+        elif conn_1_cnt != 0 or conn_2_cnt != 0:
+            dist += (c2 * 1.0)
 
-        dist += (c3 * c_dist)
         dist = (dist / 3.0)
         assert (0.0 <= dist <= 1)
         return dist
 
+    def _compare(self, other_genome, connection_config):
+        """
+        Single sorted merge over innovation ids, ids of the longer genome left after the merge are beyond the other
+        genome's last innovation and hence excess
+        :return: Disjoint count, excess count, matched count and summed weight distance of matched connections
+        """
+        connections_1, connections_2 = self.connections, other_genome.connections
+        c_list_1, c_list_2 = sorted(connections_1), sorted(connections_2)
+        wdiff_max = abs(connection_config.weight_min_value - connection_config.weight_max_value)
+
+        idx_1, idx_2, nb_disjoint, nb_matched, c_dist = 0, 0, 0, 0, 0.0
+        while idx_1 < len(c_list_1) and idx_2 < len(c_list_2):
+            c_id_1, c_id_2 = c_list_1[idx_1], c_list_2[idx_2]
+            if c_id_1 == c_id_2:
+                wdiff = abs(connections_1[c_id_1].weight - connections_2[c_id_2].weight)
+                c_dist += normalize(0.0, wdiff_max, wdiff, 0.0, 1.0)
+                nb_matched += 1
+                idx_1 += 1
+                idx_2 += 1
+            elif c_id_1 < c_id_2:
+                nb_disjoint += 1
+                idx_1 += 1
+            else:
+                nb_disjoint += 1
+                idx_2 += 1
+
+        nb_excess = (len(c_list_1) - idx_1) + (len(c_list_2) - idx_2)
+        return nb_disjoint, nb_excess, nb_matched, c_dist
+
+    def _compare_vectorized(self, other_genome, connection_config):
+        """
+        NumPy counterpart of _compare for large genomes
+        :return: Disjoint count, excess count, matched count and summed weight distance of matched connections
+        """
+        c_ids_1 = np.fromiter(self.connections.keys(), dtype=np.int64, count=len(self.connections))
+        c_ids_2 = np.fromiter(other_genome.connections.keys(), dtype=np.int64, count=len(other_genome.connections))
+        weights_1 = np.fromiter((c.weight for c in self.connections.values()), dtype=float, count=len(c_ids_1))
+        weights_2 = np.fromiter((c.weight for c in other_genome.connections.values()), dtype=float, count=len(c_ids_2))
+        wdiff_max = abs(connection_config.weight_min_value - connection_config.weight_max_value)
+
+        _, matched_1, matched_2 = np.intersect1d(c_ids_1, c_ids_2, assume_unique=True, return_indices=True)
+        excess_threshold = min(c_ids_1.max(), c_ids_2.max())
+        nb_excess = int(np.count_nonzero(c_ids_1 > excess_threshold) + np.count_nonzero(c_ids_2 > excess_threshold))
+        nb_matched = len(matched_1)
+        nb_disjoint = len(c_ids_1) + len(c_ids_2) - (2 * nb_matched) - nb_excess
+        c_dist = float(np.sum(np.abs(weights_1[matched_1] - weights_2[matched_2]) / wdiff_max))
+        return nb_disjoint, nb_excess, nb_matched, c_dist
+
     def mutate(self, regulation, config):
+        self.mutate_structure(regulation, config)
+        self.mutate_parameters(config)
+
+    def mutate_structure(self, regulation, config):
 
         node_add_rate = regulation.node_add_rate
         node_delete_rate = regulation.node_delete_rate
@@ -219,6 +330,8 @@ class Genome(object):
             if random.random() < conn_delete_rate:
                 self.mutate_delete_connection()
 
+    def mutate_parameters(self, config):
+        # Population wide counterpart in evolving_networks.genome.mutation
         mutate_nodes, mutate_connections = [], []
 
         mutable_nodes = set().union(self.node_ids['hidden'], self.node_ids['output'])
@@ -231,22 +344,20 @@ class Genome(object):
             mutate_connections = np.random.choice(list(self.connections.keys()), nb_mutate_connections, replace=False)
 
         for n_id in mutate_nodes:
-            self.nodes[n_id].mutate(config.node)
+            self._own_node(n_id).mutate(config.node)
         for c_id in mutate_connections:
-            self.connections[c_id].mutate(config.connection)
+            self._own_connection(c_id).mutate(config.connection)
 
     def mutate_add_node(self, config):
         if len(self.connections) == 0:
             return False
 
-        connection = random.choice(list(self.connections.values()))
+        connection = self._own_connection(random.choice(list(self.connections.keys())))
         n_id = self._next_node_id()
         self._create_node(n_id, 'hidden', config=config.node)
         self.node_ids['hidden'].add(n_id)
         self.node_ids['all'].add(n_id)
 
-        self._compute_probable_connectors(n_id)
-
         connection.enabled = False
         source_id = connection.source_id
         target_id = connection.target_id
@@ -266,37 +377,58 @@ class Genome(object):
                 connections_to_delete.add(c_id)
 
         for c_id in connections_to_delete:
-            self._connectors.remove((self.connections[c_id].source_id, self.connections[c_id].target_id))
+            self._remove_connector(self.connections[c_id].source_id, self.connections[c_id].target_id)
             del self.connections[c_id]
 
         self.node_ids['all'].remove(n_id)
         self.node_ids['hidden'].remove(n_id)
         del self.nodes[n_id]
-
-        self._cyclic_connectors = {(x, y) for x, y in self._cyclic_connectors if x != n_id and y != n_id}
-        self._acyclic_connectors = {(x, y) for x, y in self._acyclic_connectors if x != n_id and y != n_id}
         return True
 
     def mutate_add_connection(self, config):
-        if config.genome.feed_forward:
-            possible_connectors = self._acyclic_connectors - self._connectors
-        else:
-            possible_connectors = self._cyclic_connectors - self._connectors
+        feed_forward = config.genome.feed_forward
+
+        # Connectors are drawn uniformly from sources x targets, invalid, existing or cyclic ones are rejected
+        sources = list(self.node_ids['input']) + list(self.node_ids['hidden'])
+        if not feed_forward:
+            sources += list(self.node_ids['output'])
+        targets = list(self.node_ids['hidden']) + list(self.node_ids['output'])
+        if len(sources) == 0 or len(targets) == 0:
+            return False
+
+        # Nodes reachable from every examined target
+        descendants = {}
 
+        for _ in range(_connector_sampling_attempts):
+            connector = (random.choice(sources), random.choice(targets))
+            if self._is_possible_connector(connector, feed_forward, descendants):
+                self._create_connection(connector[0], connector[1], config=config.connection)
+                return True
+
+        # Densely connected genomes fall back to enumerating the remaining connectors
+        possible_connectors = [(source_id, target_id) for source_id in sources for target_id in targets if
+                               self._is_possible_connector((source_id, target_id), feed_forward, descendants)]
         if len(possible_connectors) == 0:
             return False
 
-        while len(possible_connectors) > 0:
-            connector = random.choice(list(possible_connectors))
+        connector = random.choice(possible_connectors)
+        self._create_connection(connector[0], connector[1], config=config.connection)
+        return True
 
-            if config.genome.feed_forward:
-                if self._is_cyclic(connector[0], connector[1]) is True:
-                    possible_connectors.remove(connector)
-                    continue
+    def _is_possible_connector(self, connector, feed_forward, descendants):
+        if connector in self._connectors:
+            return False
 
-            self._create_connection(connector[0], connector[1], config=config.connection)
-            return True
-        return False
+        source_id, target_id = connector
+        if source_id in self.node_ids['output']:
+            # Output nodes only feed back into hidden nodes or themselves
+            return target_id == source_id or target_id in self.node_ids['hidden']
+        if feed_forward:
+            # Connector closes a cycle when its source is reachable from its target (self loops included)
+            if target_id not in descendants:
+                descendants[target_id] = self._descendants(target_id)
+            return source_id not in descendants[target_id]
+        return True
 
     def mutate_delete_connection(self):
         if len(self.connections) < 2:
@@ -306,7 +438,7 @@ class Genome(object):
         c_id = connection.id
         source_id = connection.source_id
         target_id = connection.target_id
-        self._connectors.remove((source_id, target_id))
+        self._remove_connector(source_id, target_id)
         del self.connections[c_id]
 
         if source_id == target_id:
@@ -314,30 +446,15 @@ class Genome(object):
                 self.node_ids['all'].remove(source_id)
                 self.node_ids['hidden'].remove(source_id)
                 del self.nodes[source_id]
-
-                self._cyclic_connectors = {(x, y) for x, y in self._cyclic_connectors if
-                                           x != source_id and y != source_id}
-                self._acyclic_connectors = {(x, y) for x, y in self._acyclic_connectors if
-                                            x != source_id and y != source_id}
         else:
             if self._is_redundant_node(source_id):
                 self.node_ids['all'].remove(source_id)
                 self.node_ids['hidden'].remove(source_id)
                 del self.nodes[source_id]
-
-                self._cyclic_connectors = {(x, y) for x, y in self._cyclic_connectors if
-                                           x != source_id and y != source_id}
-                self._acyclic_connectors = {(x, y) for x, y in self._acyclic_connectors if
-                                            x != source_id and y != source_id}
             if self._is_redundant_node(target_id):
                 self.node_ids['all'].remove(target_id)
                 self.node_ids['hidden'].remove(target_id)
                 del self.nodes[target_id]
-
-                self._cyclic_connectors = {(x, y) for x, y in self._cyclic_connectors if
-                                           x != target_id and y != target_id}
-                self._acyclic_connectors = {(x, y) for x, y in self._acyclic_connectors if
-                                            x != target_id and y != target_id}
         return True
 
     def _is_redundant_node(self, n_id):
@@ -354,20 +471,48 @@ class Genome(object):
         if source_id == target_id:
             return True
 
-        visited = {target_id}
-        while True:
-            num_added = 0
-            for connection in self.connections.values():
-                a, b = connection.source_id, connection.target_id
-                if a in visited and b not in visited:
-                    if b == source_id:
-                        return True
+        outgoing = self._adjacency()
+        visited, stack = {target_id}, [target_id]
+        while stack:
+            for n_id in outgoing.get(stack.pop(), ()):
+                if n_id == source_id:
+                    return True
 
-                    visited.add(b)
-                    num_added += 1
+                if n_id not in visited:
+                    visited.add(n_id)
+                    stack.append(n_id)
+        return False
 
-            if num_added == 0:
-                return False
+    def _descendants(self, n_id):
+        """
+        Depth first search over outgoing connectors
+        :return: Set of nodes reachable from the node, including the node itself
+        """
+        outgoing = self._adjacency()
+        visited, stack = {n_id}, [n_id]
+        while stack:
+            for target_id in outgoing.get(stack.pop(), ()):
+                if target_id not in visited:
+                    visited.add(target_id)
+                    stack.append(target_id)
+        return visited
+
+    def _adjacency(self):
+        if self._outgoing is None:
+            self._outgoing = {}
+            for source_id, target_id in self._connectors:
+                self._outgoing.setdefault(source_id, set()).add(target_id)
+        return self._outgoing
+
+    def _add_connector(self, source_id, target_id):
+        self._connectors.add((source_id, target_id))
+        if self._outgoing is not None:
+            self._outgoing.setdefault(source_id, set()).add(target_id)
+
+    def _remove_connector(self, source_id, target_id):
+        self._connectors.remove((source_id, target_id))
+        if self._outgoing is not None:
+            self._outgoing[source_id].discard(target_id)
 
     def crossover_sexual(self, parent_1, parent_2, config):
         fitness_case = 'unequal'
@@ -408,7 +553,7 @@ class Genome(object):
             new_c = c1.crossover(c2)
             assert new_c.id not in self.connections
             self.connections[new_c.id] = new_c
-            self._connectors.add((new_c.source_id, new_c.target_id))
+            self._add_connector(new_c.source_id, new_c.target_id)
             required_nodes.add(new_c.source_id)
             required_nodes.add(new_c.target_id)
 
@@ -420,7 +565,7 @@ class Genome(object):
                         if config.genome.feed_forward:
                             if self._is_cyclic(c.source_id, c.target_id) is True:
                                 continue
-                        self._create_connection(c.source_id, c.target_id, c.weight, c.enabled)
+                        self._inherit_connection(c)
                         required_nodes.add(c.source_id)
                         required_nodes.add(c.target_id)
                 else:
@@ -429,7 +574,7 @@ class Genome(object):
                         if config.genome.feed_forward:
                             if self._is_cyclic(c.source_id, c.target_id) is True:
                                 continue
-                        self._create_connection(c.source_id, c.target_id, c.weight, c.enabled)
+                        self._inherit_connection(c)
                         required_nodes.add(c.source_id)
                         required_nodes.add(c.target_id)
             else:
@@ -438,7 +583,7 @@ class Genome(object):
                     if config.genome.feed_forward:
                         if self._is_cyclic(c.source_id, c.target_id) is True:
                             continue
-                    self._create_connection(c.source_id, c.target_id, c.weight, c.enabled)
+                    self._inherit_connection(c)
                     required_nodes.add(c.source_id)
                     required_nodes.add(c.target_id)
 
@@ -489,40 +634,46 @@ class Genome(object):
             else:
                 raise InvalidConditionalError()
 
-        self._compute_probable_connectors()
-
         self._node_idx = count(max(parent_1.node_idx_cntr, parent_2.node_idx_cntr) + 1)
         self.node_idx_cntr = max(parent_1.node_idx_cntr, parent_2.node_idx_cntr)
 
     def crossover_asexual(self, parent):
-        for node in parent.nodes.values():
-            assert node.id not in self.nodes
-            self._create_node(node.id, node.type, node.bias, node.res, node.act, node.agg)
-            self.node_ids['all'].add(node.id)
-            self.node_ids[node.type].add(node.id)
+        self._share(parent)
 
-        self._compute_probable_connectors()
-
-        for connection in parent.connections.values():
-            self._create_connection(connection.source_id, connection.target_id, connection.weight, connection.enabled)
+    def clone(self, parent):
+        self._share(parent)
+
+    def _share(self, parent):
+        """
+        Copy on write inheritance, the genome references the parent's genes until it mutates them
+        """
+        assert len(self.nodes) == 0 and len(self.connections) == 0
+        self.nodes = dict(parent.nodes)
+        self.connections = dict(parent.connections)
+        self._connectors = set(parent._connectors)
+        self.node_ids = {k: set(v) for k, v in parent.node_ids.items()}
+        self._outgoing = None
+
+        # Genes become shared for both genomes, the parent may still be mutated after being cloned
+        parent._shared_nodes.update(parent.nodes)
+        parent._shared_connections.update(parent.connections)
+        self._shared_nodes = set(parent.nodes)
+        self._shared_connections = set(parent.connections)
 
         self._node_idx = count(parent.node_idx_cntr + 1)
         self.node_idx_cntr = parent.node_idx_cntr
 
-    def clone(self, parent):
-        for node in parent.nodes.values():
-            assert node.id not in self.nodes
-            self._create_node(node.id, node.type, node.bias, node.res, node.act, node.agg)
-            self.node_ids['all'].add(node.id)
-            self.node_ids[node.type].add(node.id)
-
-        self._compute_probable_connectors()
-
-        for connection in parent.connections.values():
-            self._create_connection(connection.source_id, connection.target_id, connection.weight, connection.enabled)
+    def _own_node(self, n_id):
+        if n_id in self._shared_nodes:
+            self.nodes[n_id] = self.nodes[n_id].copy()
+            self._shared_nodes.discard(n_id)
+        return self.nodes[n_id]
 
-        self._node_idx = count(parent.node_idx_cntr + 1)
-        self.node_idx_cntr = parent.node_idx_cntr
+    def _own_connection(self, c_id):
+        if c_id in self._shared_connections:
+            self.connections[c_id] = self.connections[c_id].copy()
+            self._shared_connections.discard(c_id)
+        return self.connections[c_id]
 
     def _next_node_id(self):
         n_id = next(self._node_idx)
@@ -530,47 +681,6 @@ class Genome(object):
         assert n_id not in self.nodes
         return n_id
 
-    def _compute_probable_connectors(self, inserted_node_id=None):
-        if inserted_node_id is None:
-            for input_id in self.node_ids['input']:
-                for hidden_id in self.node_ids['hidden']:
-                    self._cyclic_connectors.add((input_id, hidden_id))
-                    self._acyclic_connectors.add((input_id, hidden_id))
-                for output_id in self.node_ids['output']:
-                    self._cyclic_connectors.add((input_id, output_id))
-                    self._acyclic_connectors.add((input_id, output_id))
-
-            for hidden_id_1 in self.node_ids['hidden']:
-                for hidden_id_2 in self.node_ids['hidden']:
-                    self._cyclic_connectors.add((hidden_id_1, hidden_id_2))
-                    if hidden_id_1 != hidden_id_2:
-                        self._acyclic_connectors.add((hidden_id_1, hidden_id_2))
-                for output_id in self.node_ids['output']:
-                    self._cyclic_connectors.add((hidden_id_1, output_id))
-                    self._acyclic_connectors.add((hidden_id_1, output_id))
-
-            for output_id in self.node_ids['output']:
-                for hidden_id in self.node_ids['hidden']:
-                    self._cyclic_connectors.add((output_id, hidden_id))
-                self._cyclic_connectors.add((output_id, output_id))
-        else:
-            for input_id in self.node_ids['input']:
-                self._cyclic_connectors.add((input_id, inserted_node_id))
-                self._acyclic_connectors.add((input_id, inserted_node_id))
-
-            for hidden_id in self.node_ids['hidden']:
-                self._cyclic_connectors.add((hidden_id, inserted_node_id))
-                self._cyclic_connectors.add((inserted_node_id, hidden_id))
-
-                if hidden_id != inserted_node_id:
-                    self._acyclic_connectors.add((hidden_id, inserted_node_id))
-                    self._acyclic_connectors.add((inserted_node_id, hidden_id))
-
-            for output_id in self.node_ids['output']:
-                self._cyclic_connectors.add((inserted_node_id, output_id))
-                self._cyclic_connectors.add((output_id, inserted_node_id))
-                self._acyclic_connectors.add((inserted_node_id, output_id))
-
     def initialize(self, node_config, connection_config):
         for _ in range(self.config.num_inputs):
             n_id = self._next_node_id()
@@ -590,8 +700,6 @@ class Genome(object):
             self.node_ids['output'].add(n_id)
             self.node_ids['all'].add(n_id)
 
-        self._compute_probable_connectors()
-
         if self.config.initial_connection == 'fs_neat_no_hidden':
             source_id = random.choice(list(self.node_ids['input']))
             for target_id in self.node_ids['output']:
@@ -651,21 +759,30 @@ class Genome(object):
 
         return connectors
 
+    def _inherit_connection(self, connection):
+        """
+        Copies a parent's connection keeping its innovation id, unless the connector is already inherited under another
+        id (connectors forgotten by the innovation tracker get new ids)
+        """
+        if (connection.source_id, connection.target_id) in self._connectors:
+            return
+        self.connections[connection.id] = connection.copy()
+        self._add_connector(connection.source_id, connection.target_id)
+
     def _create_node(self, _id, _type, bias=None, res=None, act=None, agg=None, config=None):
         node = Node()
         node.initialize(_id, _type, bias, res, act, agg, config)
         self.nodes[_id] = node
+        self._shared_nodes.discard(_id)
 
     def _create_connection(self, source_id, target_id, weight=None, enabled=None, config=None):
-        if (source_id, target_id) in self.__class__._innovation_archive:
-            _id = self.__class__._innovation_archive[(source_id, target_id)]
-        else:
-            _id = next(self.__class__._innovation_idx)
-            self._innovation_idx_cntr = _id
-            self.__class__._innovation_archive[(source_id, target_id)] = _id
-
+        if self.innovations is None:
+            # Genomes without a tracker, e.g. loaded from json, number new connectors after their own connections
+            self.innovations = InnovationTracker().rebuild(self.connections.values())
+        _id = self.innovations.get(source_id, target_id)
         assert (_id not in self.connections)
         connection = Connection()
         connection.initialize(_id, source_id, target_id, weight, enabled, config)
         self.connections[_id] = connection
-        self._connectors.add((source_id, target_id))
+        self._shared_connections.discard(_id)
+        self._add_connector(source_id, target_id)
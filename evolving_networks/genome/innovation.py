@@ -0,0 +1,90 @@
+"""
+# ==============
+# References
+# ==============
+
+[1] http://nn.cs.utexas.edu/downloads/papers/stanley.ec02.pdf
+
+"""
+
+from collections import OrderedDict
+
+from evolving_networks.errors import InvalidConfigurationError
+
+_retentions = ('global', 'generation', 'lru')
+
+
+class InnovationTracker(object):
+    """
+    Innovation ids of connectors, the same (source, target) connector created by several genomes shares one id.
+    Retention 'global' remembers every connector, 'generation' forgets them at every generation as in [1] pg.108 and
+    'lru' keeps the max_size most recently used ones. Ids of forgotten connectors are never handed out again.
+    Offspring created in other processes use a fork of the tracker handing out negative provisional ids for new
+    connectors, these are merged back into the tracker and replaced in the offspring (see Genome.remap_innovations).
+    Genomes created without a tracker rebuild one from their own connections when they first add a connection.
+    """
+
+    def __init__(self, retention='global', max_size=65536):
+        if retention not in _retentions:
+            raise InvalidConfigurationError('Unexpected innovation retention [{}]'.format(retention))
+        self.retention = retention
+        self.max_size = max_size
+        self.archive = OrderedDict()
+        self.innovation_idx_cntr = -1
+        self._innovation_step = 1
+
+    def get(self, source_id, target_id):
+        connector = (source_id, target_id)
+        _id = self.archive.get(connector)
+        if _id is None:
+            _id = self.innovation_idx_cntr + self._innovation_step
+            self.innovation_idx_cntr = _id
+            self.archive[connector] = _id
+            if self.retention == 'lru' and len(self.archive) > self.max_size:
+                self.archive.popitem(last=False)
+        elif self.retention == 'lru':
+            self.archive.move_to_end(connector)
+        return _id
+
+    def rebuild(self, connections):
+        """
+        Remembers the connectors of existing connections, new connectors get ids after the largest one
+        :return: This tracker
+        """
+        for connection in connections:
+            self.archive[(connection.source_id, connection.target_id)] = connection.id
+            self.innovation_idx_cntr = max(self.innovation_idx_cntr, connection.id)
+        return self
+
+    def fork(self):
+        """
+        Empty provisional tracker to be sent to a worker process, only its id counters are set so that its size does
+        not depend on the archive. Connectors already known to this tracker are resolved when the fork is merged.
+        :return: Tracker handing out ids -1, -2, ... for every connector created through it
+        """
+        tracker = InnovationTracker()
+        tracker.innovation_idx_cntr = 0
+        tracker._innovation_step = -1
+        return tracker
+
+    def provisional(self):
+        """
+        Connectors created through this fork, in creation order
+        :return: List of ((source_id, target_id), provisional id)
+        """
+        return [(connector, _id) for connector, _id in self.archive.items() if _id < 0]
+
+    def merge(self, provisional):
+        """
+        Assigns ids to the connectors created by a fork, connectors already known or created by previously merged
+        forks get their existing id. Forks have to be merged in a fixed order for innovation ids to be reproducible.
+        :return: Mapping of provisional ids to merged ids
+        """
+        return {_id: self.get(source_id, target_id) for (source_id, target_id), _id in provisional}
+
+    def next_generation(self):
+        if self.retention == 'generation':
+            self.archive.clear()
+
+    def __len__(self):
+        return len(self.archive)
@@ -0,0 +1,148 @@
+from itertools import chain
+
+import numpy as np
+
+from evolving_networks.errors import InvalidConfigurationError
+
+
+def mutate_parameters(genomes, config, rng):
+    """
+    Parameter mutation of many genomes at once, the batched counterpart of Genome.mutate_parameters.
+    Every genome mutates a random share of its hidden and output nodes and of its connections, the mutations of the
+    selected genes of all genomes are drawn as arrays from a single NumPy generator. Only genes actually changed are
+    copied from a shared parent (see Genome.clone) and written back.
+    :return: Number of mutated nodes and connections
+    """
+    mutable_nodes = [list(chain(genome.node_ids['hidden'], genome.node_ids['output'])) for genome in genomes]
+    node_genomes, node_ids = _select_genes(mutable_nodes, rng)
+    nb_nodes = _mutate_nodes(genomes, node_genomes, node_ids, config.node, rng)
+
+    connection_genomes, connection_ids = _select_genes([list(genome.connections) for genome in genomes], rng)
+    nb_connections = _mutate_connections(genomes, connection_genomes, connection_ids, config.connection, rng)
+    return nb_nodes, nb_connections
+
+
+def _select_genes(gene_ids, rng):
+    """
+    Draws without replacement a probabilistically rounded uniform share of the genes of every genome
+    :return: Genome indices and gene ids of the selected genes
+    """
+    sizes = np.array([len(ids) for ids in gene_ids], dtype=np.int64)
+    shares = rng.random(len(sizes)) * sizes
+    counts = np.floor(shares).astype(np.int64) + (rng.random(len(sizes)) < (shares - np.floor(shares)))
+
+    # Genes ranked by a random key within their genome, the lowest ranked ones are selected
+    genome_idx = np.repeat(np.arange(len(sizes)), sizes)
+    order = np.lexsort((rng.random(len(genome_idx)), genome_idx))
+    starts = np.cumsum(sizes) - sizes
+    rank = np.arange(len(order)) - starts[genome_idx[order]]
+    selected = np.sort(order[rank < counts[genome_idx[order]]])
+
+    flat_ids = np.fromiter(chain.from_iterable(gene_ids), dtype=np.int64, count=len(genome_idx))
+    return genome_idx[selected].tolist(), flat_ids[selected].tolist()
+
+
+def _mutation_choice(mutation_probs, rng):
+    """
+    Picks a single mutation per gene with probabilities proportional to the rows of mutation_probs
+    :return: Mutation index per gene, -1 for genes without any possible mutation
+    """
+    probs_sum = np.sum(mutation_probs, axis=1)
+    cumulative = np.cumsum(mutation_probs, axis=1)
+    draws = rng.random(len(mutation_probs)) * probs_sum
+    choice = np.minimum(np.sum(cumulative <= draws[:, np.newaxis], axis=1), mutation_probs.shape[1] - 1)
+    return np.where(probs_sum > 0.0, choice, -1)
+
+
+def _initial_values(init_type, init_mean, init_stdev, min_value, max_value, size, rng):
+    if init_type == 'normal':
+        return np.clip(rng.normal(init_mean, init_stdev, size), min_value, max_value)
+    elif init_type == 'uniform':
+        return rng.uniform(max(min_value, (init_mean - (2 * init_stdev))),
+                           min(max_value, (init_mean + (2 * init_stdev))), size)
+    else:
+        raise InvalidConfigurationError()
+
+
+def _mutate_connections(genomes, genome_indices, connection_ids, config, rng):
+    nb_genes = len(connection_ids)
+    if config.single_structural_mutation:
+        mutation_probs = np.tile([config.weight_mutate_rate, config.weight_replace_rate, config.enabled_mutate_rate],
+                                 (nb_genes, 1))
+        choice = _mutation_choice(mutation_probs, rng)
+        perturb, replace, toggle = choice == 0, choice == 1, choice == 2
+    else:
+        perturb = rng.random(nb_genes) < config.weight_mutate_rate
+        replace = rng.random(nb_genes) < config.weight_replace_rate
+        toggle = rng.random(nb_genes) < config.enabled_mutate_rate
+
+    changed = np.flatnonzero(perturb | replace | toggle)
+    perturb, replace, toggle = perturb[changed], replace[changed], toggle[changed]
+    connections = [genomes[genome_indices[idx]]._own_connection(connection_ids[idx]) for idx in changed]
+    weights = np.array([c.weight for c in connections], dtype=float)
+    enabled = np.array([c.enabled for c in connections], dtype=bool)
+
+    weights[perturb] = np.clip(weights[perturb] + rng.normal(0.0, config.weight_mutate_stdev, np.sum(perturb)),
+                               config.weight_min_value, config.weight_max_value)
+    weights[replace] = _initial_values(config.weight_init_type, config.weight_init_mean, config.weight_init_stdev,
+                                       config.weight_min_value, config.weight_max_value, np.sum(replace), rng)
+    enabled[toggle] = ~enabled[toggle]
+
+    for connection, weight, is_enabled in zip(connections, weights.tolist(), enabled.tolist()):
+        connection.weight = weight
+        connection.enabled = is_enabled
+    return len(connections)
+
+
+def _mutate_nodes(genomes, genome_indices, node_ids, config, rng):
+    nb_genes = len(node_ids)
+    act_opt, agg_opt = config.activation_options, config.aggregation_options
+    act_possible = np.array([n_id in genomes[g_idx].node_ids['hidden'] and len(act_opt) > 1 for g_idx, n_id in
+                             zip(genome_indices, node_ids)], dtype=bool)
+    agg_possible = np.full(nb_genes, len(agg_opt) > 1)
+
+    if config.single_structural_mutation:
+        mutation_probs = np.tile([config.bias_mutate_rate, config.bias_replace_rate, config.response_mutate_rate,
+                                  config.response_replace_rate, config.activation_mutate_rate,
+                                  config.aggregation_mutate_rate], (nb_genes, 1))
+        mutation_probs[:, 4] *= act_possible
+        mutation_probs[:, 5] *= agg_possible
+        choice = _mutation_choice(mutation_probs, rng)
+        perturb_bias, replace_bias, perturb_res, replace_res, mutate_act, mutate_agg = [choice == i for i in range(6)]
+    else:
+        perturb_bias = rng.random(nb_genes) < config.bias_mutate_rate
+        replace_bias = rng.random(nb_genes) < config.bias_replace_rate
+        perturb_res = rng.random(nb_genes) < config.response_mutate_rate
+        replace_res = rng.random(nb_genes) < config.response_replace_rate
+        mutate_act = (rng.random(nb_genes) < config.activation_mutate_rate) & act_possible
+        mutate_agg = (rng.random(nb_genes) < config.aggregation_mutate_rate) & agg_possible
+
+    changed = np.flatnonzero(perturb_bias | replace_bias | perturb_res | replace_res | mutate_act | mutate_agg)
+    perturb_bias, replace_bias, perturb_res, replace_res, mutate_act, mutate_agg = [
+        mask[changed] for mask in (perturb_bias, replace_bias, perturb_res, replace_res, mutate_act, mutate_agg)]
+    nodes = [genomes[genome_indices[idx]]._own_node(node_ids[idx]) for idx in changed]
+    bias = np.array([n.bias for n in nodes], dtype=float)
+    res = np.array([n.res for n in nodes], dtype=float)
+
+    bias[perturb_bias] = np.clip(bias[perturb_bias] + rng.normal(0.0, config.bias_mutate_stdev, np.sum(perturb_bias)),
+                                 config.bias_min_value, config.bias_max_value)
+    bias[replace_bias] = _initial_values(config.bias_init_type, config.bias_init_mean, config.bias_init_stdev,
+                                         config.bias_min_value, config.bias_max_value, np.sum(replace_bias), rng)
+    res[perturb_res] = np.clip(res[perturb_res] + rng.normal(0.0, config.response_mutate_stdev, np.sum(perturb_res)),
+                               config.response_min_value, config.response_max_value)
+    res[replace_res] = _initial_values(config.response_init_type, config.response_init_mean,
+                                       config.response_init_stdev, config.response_min_value,
+                                       config.response_max_value, np.sum(replace_res), rng)
+
+    for node, node_bias, node_res in zip(nodes, bias.tolist(), res.tolist()):
+        node.bias = node_bias
+        node.res = node_res
+
+    # Functions change to any other option, drawn as an index among the remaining options
+    for idx in np.flatnonzero(mutate_act):
+        choice_idx = int(rng.integers(len(act_opt) - 1))
+        nodes[idx].act = act_opt[choice_idx + (choice_idx >= act_opt.index(nodes[idx].act))]
+    for idx in np.flatnonzero(mutate_agg):
+        choice_idx = int(rng.integers(len(agg_opt) - 1))
+        nodes[idx].agg = agg_opt[choice_idx + (choice_idx >= agg_opt.index(nodes[idx].agg))]
+    return len(nodes)
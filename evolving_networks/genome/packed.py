@@ -0,0 +1,278 @@
+import numpy as np
+
+from evolving_networks.genome.genome import Genome
+from evolving_networks.math_util import normalize
+
+_node_types = ('input', 'hidden', 'output')
+
+
+class NodeView(object):
+    """
+    Node gene reading and writing a row of the node array of a packed genome.
+    """
+
+    def __init__(self, genome, idx):
+        self._genome = genome
+        self._idx = idx
+
+    @property
+    def id(self):
+        return int(self._genome.node_array['id'][self._idx])
+
+    @property
+    def type(self):
+        return _node_types[self._genome.node_array['type'][self._idx]]
+
+    @property
+    def bias(self):
+        return float(self._genome.node_array['bias'][self._idx])
+
+    @bias.setter
+    def bias(self, value):
+        self._genome.node_array['bias'][self._idx] = value
+
+    @property
+    def res(self):
+        return float(self._genome.node_array['res'][self._idx])
+
+    @res.setter
+    def res(self, value):
+        self._genome.node_array['res'][self._idx] = value
+
+    @property
+    def act(self):
+        return str(self._genome.node_array['act'][self._idx])
+
+    @property
+    def agg(self):
+        return str(self._genome.node_array['agg'][self._idx])
+
+    def __str__(self):
+        attributes = ['id', 'type', 'bias', 'res', 'act', 'agg']
+        attrib = ['{0}={1}'.format(a, getattr(self, a)) for a in attributes]
+        return '{0}({1})'.format(self.__class__.__name__, ", ".join(attrib))
+
+
+class ConnectionView(object):
+    """
+    Connection gene reading and writing a position of the connection arrays of a packed genome.
+    """
+
+    def __init__(self, genome, idx):
+        self._genome = genome
+        self._idx = idx
+
+    @property
+    def id(self):
+        return int(self._genome.connection_ids[self._idx])
+
+    @property
+    def source_id(self):
+        return int(self._genome.source_ids[self._idx])
+
+    @property
+    def target_id(self):
+        return int(self._genome.target_ids[self._idx])
+
+    @property
+    def weight(self):
+        return float(self._genome.weights[self._idx])
+
+    @weight.setter
+    def weight(self, value):
+        self._genome.weights[self._idx] = value
+
+    @property
+    def enabled(self):
+        return bool(self._genome.enabled[self._idx])
+
+    @enabled.setter
+    def enabled(self, value):
+        self._genome.enabled[self._idx] = value
+
+    def __str__(self):
+        attributes = ['id', 'source_id', 'target_id', 'weight', 'enabled']
+        attrib = ['{0}={1}'.format(a, getattr(self, a)) for a in attributes]
+        return '{0}({1})'.format(self.__class__.__name__, ", ".join(attrib))
+
+
+class PackedGenome(object):
+    """
+    Array packed storage of a Genome, selected for population members with the DefaultGenome storage option 'packed'.
+    Connections are kept as parallel arrays sorted by innovation id and nodes as a structured array, without per gene
+    objects or candidate connector sets, making it small to keep, copy or pickle. Node and connection views keep the
+    Genome interface used by phenomes, evaluators and the distance engine, they are built on every access of nodes and
+    connections and not kept with the genome. Mutation and crossover operate on Genome, reproduction unpacks parents
+    and packs off springs (see to_genome and from_genome).
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.id = None
+        self.birth_generation = None
+        self.fitness = 0.0
+        self.adjusted_fitness = 0.0
+        self.is_damaged = False
+        self.node_idx_cntr = 0
+
+        # Nodes as (id, type, bias, res, act, agg) records, node types are indices of _node_types
+        self.node_array = np.zeros(0, dtype=[('id', np.int64), ('type', np.int8), ('bias', float), ('res', float),
+                                             ('act', 'U1'), ('agg', 'U1')])
+
+        # Connections as parallel arrays in ascending innovation id order
+        self.connection_ids = np.zeros(0, dtype=np.int64)
+        self.source_ids = np.zeros(0, dtype=np.int64)
+        self.target_ids = np.zeros(0, dtype=np.int64)
+        self.weights = np.zeros(0)
+        self.enabled = np.zeros(0, dtype=bool)
+
+    @property
+    def complexity(self):
+        return len(self.connection_ids)
+
+    def __lt__(self, other):
+        if self.fitness == other.fitness:
+            return self.birth_generation < other.birth_generation
+        return self.fitness < other.fitness
+
+    def __le__(self, other):
+        if self.fitness == other.fitness:
+            return self.birth_generation <= other.birth_generation
+        return self.fitness <= other.fitness
+
+    def __gt__(self, other):
+        if self.fitness == other.fitness:
+            return self.birth_generation > other.birth_generation
+        return self.fitness > other.fitness
+
+    def __ge__(self, other):
+        if self.fitness == other.fitness:
+            return self.birth_generation >= other.birth_generation
+        return self.fitness >= other.fitness
+
+    def __str__(self):
+        s = "Id: {0}\nFitness: {1}".format(self.id, self.fitness)
+        s += "\nNodes:"
+        for n_id, node in self.nodes.items():
+            s += "\n\t{0} {1!s}".format(n_id, node)
+        s += "\nConnections:"
+        for connection in self.connections.values():
+            s += "\n\t{0!s}".format(connection)
+        return s
+
+    @property
+    def nodes(self):
+        return {int(n_id): NodeView(self, idx) for idx, n_id in enumerate(self.node_array['id'])}
+
+    @property
+    def connections(self):
+        return {int(c_id): ConnectionView(self, idx) for idx, c_id in enumerate(self.connection_ids)}
+
+    @property
+    def node_ids(self):
+        node_ids = {'all': set(self.node_array['id'].tolist())}
+        for type_idx, node_type in enumerate(_node_types):
+            node_ids[node_type] = set(self.node_array['id'][self.node_array['type'] == type_idx].tolist())
+        return node_ids
+
+    def from_genome(self, genome):
+        self.id = genome.id
+        self.birth_generation = genome.birth_generation
+        self.fitness = genome.fitness
+        self.adjusted_fitness = genome.adjusted_fitness
+        self.is_damaged = genome.is_damaged
+        self.node_idx_cntr = genome.node_idx_cntr
+
+        nodes = sorted(genome.nodes.values(), key=lambda n: n.id)
+        name_size = max([1] + [max(len(n.act), len(n.agg)) for n in nodes])
+        self.node_array = np.array(
+            [(n.id, _node_types.index(n.type), n.bias, n.res, n.act, n.agg) for n in nodes],
+            dtype=[('id', np.int64), ('type', np.int8), ('bias', float), ('res', float), ('act', 'U%d' % name_size),
+                   ('agg', 'U%d' % name_size)])
+
+        connections = sorted(genome.connections.values())
+        self.connection_ids = np.array([c.id for c in connections], dtype=np.int64)
+        self.source_ids = np.array([c.source_id for c in connections], dtype=np.int64)
+        self.target_ids = np.array([c.target_id for c in connections], dtype=np.int64)
+        self.weights = np.array([c.weight for c in connections], dtype=float)
+        self.enabled = np.array([c.enabled for c in connections], dtype=bool)
+        return self
+
+    def to_compact(self):
+        """
+        Tuple encoding shared with Genome.to_compact
+        :return: (id, birth_generation, fitness, adjusted_fitness, is_damaged, node_idx_cntr, nodes, connections)
+        """
+        nodes = tuple((n_id, _node_types[n_type], bias, res, act, agg) for (n_id, n_type, bias, res, act, agg) in
+                      self.node_array.tolist())
+        connections = tuple(zip(self.connection_ids.tolist(), self.source_ids.tolist(), self.target_ids.tolist(),
+                                self.weights.tolist(), self.enabled.tolist()))
+        return (self.id, self.birth_generation, self.fitness, self.adjusted_fitness, self.is_damaged,
+                self.node_idx_cntr, nodes, connections)
+
+    def to_genome(self):
+        return Genome(g_id=None, generation=None, config=self.config).from_compact(self.to_compact())
+
+    def to_json(self):
+        return self.to_genome().to_json()
+
+    def copy(self):
+        genome = PackedGenome(self.config)
+        for p in ['id', 'birth_generation', 'fitness', 'adjusted_fitness', 'is_damaged', 'node_idx_cntr']:
+            setattr(genome, p, getattr(self, p))
+        for p in ['node_array', 'connection_ids', 'source_ids', 'target_ids', 'weights', 'enabled']:
+            setattr(genome, p, getattr(self, p).copy())
+        return genome
+
+    def structural_fingerprint(self):
+        """
+        Enabled connectors and node functions, equal to Genome.structural_fingerprint of the same genome
+        :return: Hashable (connectors, nodes) tuple of frozensets
+        """
+        connectors = frozenset(zip(self.connection_ids[self.enabled].tolist(), self.source_ids[self.enabled].tolist(),
+                                   self.target_ids[self.enabled].tolist()))
+        nodes = frozenset([(n_id, _node_types[n_type], act, agg) for (n_id, n_type, _, _, act, agg) in
+                           self.node_array.tolist()])
+        return connectors, nodes
+
+    def parameter_fingerprint(self):
+        """
+        Complete phenome definition, equal to Genome.parameter_fingerprint of the same genome
+        :return: Hashable (connections, nodes) tuple of frozensets
+        """
+        connections = frozenset(zip(self.connection_ids[self.enabled].tolist(), self.source_ids[self.enabled].tolist(),
+                                    self.target_ids[self.enabled].tolist(), self.weights[self.enabled].tolist()))
+        nodes = frozenset([(n_id, _node_types[n_type], act, agg, bias, res) for (n_id, n_type, bias, res, act, agg) in
+                           self.node_array.tolist()])
+        return connections, nodes
+
+    def distance(self, other_genome, config):
+        dist = 0.0
+        c1 = config.genome.compatibility_disjoint_contribution
+        c2 = config.genome.compatibility_excess_contribution
+        c3 = config.genome.compatibility_weight_contribution
+
+        conn_1_cnt = len(self.connection_ids)
+        conn_2_cnt = len(other_genome.connection_ids)
+        if conn_1_cnt != 0 and conn_2_cnt != 0:
+            _, matched_1, matched_2 = np.intersect1d(self.connection_ids, other_genome.connection_ids,
+                                                     assume_unique=True, return_indices=True)
+
+            # Innovation ids are sorted, ids beyond the smaller of both last innovations are excess
+            excess_threshold = min(self.connection_ids[-1], other_genome.connection_ids[-1])
+            nb_excess = (conn_1_cnt - np.searchsorted(self.connection_ids, excess_threshold, side='right')) + (
+                conn_2_cnt - np.searchsorted(other_genome.connection_ids, excess_threshold, side='right'))
+            nb_disjoint = conn_1_cnt + conn_2_cnt - (2 * len(matched_1)) - nb_excess
+
+            dist += (c1 * normalize(0, max(conn_1_cnt, conn_2_cnt), int(nb_disjoint), 0.0, 1.0))
+            dist += (c2 * normalize(0, max(conn_1_cnt, conn_2_cnt), int(nb_excess), 0.0, 1.0))
+            if len(matched_1) > 0:
+                wdiff_max = abs(config.connection.weight_min_value - config.connection.weight_max_value)
+                wdiff = np.abs(self.weights[matched_1] - other_genome.weights[matched_2]) / wdiff_max
+                dist += (c3 * float(np.mean(wdiff)))
+        elif conn_1_cnt != 0 or conn_2_cnt != 0:
+            dist += (c2 * 1.0)
+
+        dist = (dist / 3.0)
+        assert (0.0 <= dist <= 1)
+        return dist
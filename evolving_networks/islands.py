@@ -0,0 +1,124 @@
+"""
+# ==============
+# References
+# ==============
+
+[1] https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+
+"""
+
+import concurrent.futures
+import random
+
+import numpy as np
+
+from evolving_networks.genome.genome import Genome
+from evolving_networks.math_util import stat_functions
+
+# Per island process state, set once by the pool initializer
+_island_population = None
+_island_migration_size = None
+
+
+def _initialize_island(island_idx, population_factory, fitness_function, migration_size, config, seed):
+    global _island_population, _island_migration_size
+
+    # Forked islands inherit the random state of the parent, every island draws its own
+    island_seed = None if seed is None else seed + island_idx
+    random.seed(island_seed)
+    np.random.seed(island_seed)
+
+    _island_migration_size = migration_size
+    _island_population = population_factory(island_idx, config, island_seed)
+    _island_population.initialize(fitness_function, config)
+
+
+def _evolve(compact_immigrants, n):
+    """
+    Evolves the island's population for n generations after taking in immigrants
+    :return: Compact emigrants, compact best genome and whether the fitness threshold was reached
+    """
+    population = _island_population
+    if compact_immigrants:
+        population.immigrate(compact_immigrants)
+    population.fit(n)
+
+    members = sorted(population.population.values(), reverse=True)
+    emigrants = [member.to_compact() for member in members[:_island_migration_size]]
+    return emigrants, population.best_genome.to_compact(), _is_solved(population)
+
+
+def _is_solved(population):
+    config = population.config
+    if config.neat.no_fitness_termination:
+        return False
+    members_fitness = [member.fitness for member in population.population.values()]
+    return stat_functions[config.neat.fitness_criterion](members_fitness) >= config.neat.fitness_threshold
+
+
+class Islands(object):
+    """
+    Island model running a population per process. Every island is built by population_factory(island_idx, config,
+    seed) with factories of its own, which has to be picklable (e.g. a module level function) as the fitness function.
+    Every migration_interval generations the migration_size best members of every island migrate, in their compact
+    encoding, to the next island of a ring where they replace the worst members (see Population.immigrate).
+    Islands are seeded with seed + island_idx when a seed is given, population_factory receives it to seed its
+    reproduction (e.g. Traditional(seed=seed)) and None otherwise. Call close once evolution is over.
+    """
+
+    def __init__(self, population_factory, num_islands=2, migration_interval=10, migration_size=2):
+        self.population_factory = population_factory
+        self.num_islands = num_islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+
+        self.config = None
+        self.generation = 0
+        self.best_genome = None
+        self.migrations = 0
+
+        self._executors = []
+        self._immigrants = None
+
+    def initialize(self, fitness_function, config, seed=None):
+        self.close()
+        self.config = config
+        self._executors = [concurrent.futures.ProcessPoolExecutor(max_workers=1, initializer=_initialize_island,
+                                                                  initargs=(island_idx, self.population_factory,
+                                                                            fitness_function, self.migration_size,
+                                                                            config, seed))  # [1]
+                           for island_idx in range(self.num_islands)]
+        self._immigrants = [[] for _ in range(self.num_islands)]
+
+    def fit(self, n=None):
+        if self.config.neat.no_fitness_termination and (n is None):
+            raise RuntimeError('Cannot have no generational limit with no fitness termination')
+
+        k = 0
+        while n is None or k < n:
+            epoch = self.migration_interval if n is None else min(self.migration_interval, n - k)
+            if any(self._immigrants):
+                self.migrations += 1
+            futures = [executor.submit(_evolve, immigrants, epoch) for executor, immigrants in
+                       zip(self._executors, self._immigrants)]
+            results = [future.result() for future in futures]
+            k += epoch
+            self.generation += epoch
+
+            solved = False
+            for emigrants, compact_best_genome, is_solved in results:
+                solved = solved or is_solved
+                best_genome = Genome(None, None, self.config.genome).from_compact(compact_best_genome)
+                if self.best_genome is None or best_genome.fitness > self.best_genome.fitness:
+                    self.best_genome = best_genome
+            if solved:
+                break
+
+            # Ring topology, island i receives the emigrants of island i - 1
+            self._immigrants = [results[island_idx - 1][0] for island_idx in range(self.num_islands)]
+        return self.best_genome
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
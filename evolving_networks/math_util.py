@@ -25,10 +25,11 @@ def normalize(act_min, act_max, val, norm_min=-1.0, norm_max=1.0):
     return ((val - act_min) / (act_max - act_min)) * (norm_max - norm_min) + norm_min
 
 
-def probabilistic_round(value):
+def probabilistic_round(value, rng=None):
     integer_part = math.floor(value)
     fractional_part = value - integer_part
-    return int(integer_part + 1.0 if random.random() < fractional_part else integer_part)
+    draw = random.random() if rng is None else rng.random()
+    return int(integer_part + 1.0 if draw < fractional_part else integer_part)
 
 
 stat_functions = {'min': min, 'max': max, 'mean': mean, 'stdev': stdev}
@@ -1,103 +1,149 @@
-from evolving_networks.phenome.helpers import calc_required_acyclic_depth, calc_neural_acyclic_path
-from evolving_networks.phenome.proteins.node import Node
+from operator import mul
 
+import numpy as np
+
+from evolving_networks.phenome.helpers import calc_incoming_connections, calc_activation_order
 from evolving_networks.phenome.phenome import Phenome
+from evolving_networks.phenome.plan import Plan, PlanCache
 
 
 class FeedForwardNetwork(Phenome):
+    # Compiled topologies shared by structurally identical genomes
+    plan_cache = PlanCache()
+
     def __init__(self, genome, config):
         super(FeedForwardNetwork, self).__init__()
         self.genome = genome
         self.config = config
 
-        # Node to type mappings
-        self.node_to_type = {}
+        # Node ids in activation order, the position of a node id is its value slot
+        self.node_order = []
+
+        # Value slots of input and output nodes in ascending node id order
+        self.input_slots = []
+        self.output_slots = []
 
-        # Neural activation pathways of output nodes
-        self.neuronal_paths = {}
+        # Compiled activation program as (slot, source_slots, weights, bias, response, activation, aggregation)
+        self.program = []
 
-        # Node protein collections
-        self.nodes = {'input': {}, 'hidden': {}, 'output': {}}
+        # Preallocated node output values
+        self.values = []
+
+        # Function registries and lazily compiled vectorized program for batch activation
+        self.activations = None
+        self.aggregations = None
+        self.batch_program = None
 
         # Flag for genome removal
         self.is_damaged = False
 
     def initialize(self, activations, aggregations):
-        # Set of nodes mandatory for output activation
-        required_nodes = set()
-
-        # The complete list of required (enabled) connections as (id, source_id, target_id)
-        enabled_connections = [(connection.id, connection.source_id, connection.target_id) for connection in
-                               self.genome.connections.values() if connection.enabled]
-
-        depth = calc_required_acyclic_depth(self.genome.node_ids['all'], enabled_connections)
-        for n_id in self.genome.node_ids['output']:
-            path = []
-            calc_neural_acyclic_path(depth, n_id, path)
-            required_nodes.update(path)
-            self.neuronal_paths[n_id] = path
-
-        # Create required node proteins
-        for n_id in required_nodes:
+        self.activations = activations
+        self.aggregations = aggregations
+        self.batch_program = None
+
+        fingerprint = self.genome.structural_fingerprint()
+        plan = self.plan_cache.get(fingerprint)
+        if plan is None:
+            plan = self._compile_plan()
+            self.plan_cache.put(fingerprint, plan)
+
+        self.node_order = plan.node_order
+        self.input_slots = plan.input_slots
+        self.output_slots = plan.output_slots
+
+        # Bind genome weights, biases and functions to the plan topology
+        self.program = []
+        nodes, connections = self.genome.nodes, self.genome.connections
+        for (slot, source_slots, connection_ids) in plan.entries:
             # Node gene
-            g_node = self.genome.nodes[n_id]
+            g_node = nodes[self.node_order[slot]]
             act = activations.get(g_node.act)
             agg = aggregations.get(g_node.agg)
 
-            # Node protein
-            p_node = Node(n_id, g_node.type, g_node.bias, g_node.res, act, agg)
+            weights = tuple(connections[c_id].weight for c_id in connection_ids)
+            self.program.append((slot, source_slots, weights, g_node.bias, g_node.res, act, agg))
+
+        self.values = [0.0] * len(self.node_order)
 
-            # A list of incoming weighted signals
-            incoming = []
+    def _compile_plan(self):
+        # Incoming enabled connections of every node
+        incoming = calc_incoming_connections(self.genome.connections.values())
+        node_ids = self.genome.node_ids
+        activation_order = calc_activation_order(sorted(node_ids['output']), incoming)
 
-            for (c_id, source_id, target_id) in enabled_connections:
+        # Input nodes always occupy the leading slots so that inputs map by position
+        input_ids = sorted(node_ids['input'])
+        node_order = input_ids + [n_id for n_id in activation_order if n_id not in node_ids['input']]
+        slots = {n_id: slot for slot, n_id in enumerate(node_order)}
 
-                # If target is required node then we have incoming connection dependency
-                if target_id == n_id:
-                    incoming.append((source_id, self.genome.connections[c_id].weight))
+        # Lower required nodes to a flat program topology over value slots
+        entries = []
+        for n_id in node_order[len(input_ids):]:
+            # Incoming connection dependencies of required node
+            node_incoming = incoming.get(n_id, [])
+            source_slots = tuple(slots[c.source_id] for c in node_incoming)
+            connection_ids = tuple(c.id for c in node_incoming)
+            entries.append((slots[n_id], source_slots, connection_ids))
 
-            p_node.incoming = incoming
-            self.nodes[p_node.type][n_id] = p_node
-            self.node_to_type[n_id] = p_node.type
+        input_slots = list(range(len(input_ids)))
+        output_slots = [slots[n_id] for n_id in sorted(node_ids['output'])]
+        return Plan(node_order, input_slots, output_slots, entries)
 
     def activate(self, inputs):
-        if len(self.genome.node_ids['input']) != len(inputs):
+        if len(self.input_slots) != len(inputs):
             raise RuntimeError("Unexpected number of inputs")
 
-        # Assigning incoming to input node proteins
-        for p_node, input_val in zip(self.nodes['input'].values(), inputs):
-            # Special case incoming format for input nodes
-            p_node.incoming = [input_val]
-
-        # Feed forward reset
-        self.reset()
+        values = self.values
+        values[:len(inputs)] = inputs
 
         try:
-            # Activating ordered neural pathways
-            for path in self.neuronal_paths.values():
-                for n_id in path:
-                    # Get node protein
-                    p_node = self.nodes[self.node_to_type[n_id]][n_id]
-
-                    # Only do if node isn't activated already
-                    if p_node.activated is False:
-
-                        # Special case activation for input nodes
-                        if p_node.type == 'input':
-                            p_node.activate(p_node.incoming)
-                        else:
-                            # Creating weighted incoming signals
-                            incoming = [self.nodes[self.node_to_type[i_id]][i_id].outgoing * weight for (i_id, weight)
-                                        in
-                                        p_node.incoming]
-                            p_node.activate(incoming)
+            # Activating compiled program in topological order
+            for (slot, source_slots, weights, bias, response, activation, aggregation) in self.program:
+                if source_slots:
+                    signals = map(mul, map(values.__getitem__, source_slots), weights)
+                    values[slot] = activation((aggregation(signals) * response) + bias)
+                else:
+                    values[slot] = 0.0
         except (OverflowError, ValueError):
             self.is_damaged = True
-            return [0.0 for _ in self.nodes['output'].values()]
-        return [p_node.outgoing for p_node in self.nodes['output'].values()]
+            return [0.0 for _ in self.output_slots]
+        return [values[slot] for slot in self.output_slots]
+
+    def _compile_batch_program(self):
+        batch_program = []
+        nodes = self.genome.nodes
+        for (slot, source_slots, weights, bias, response, _, _) in self.program:
+            g_node = nodes[self.node_order[slot]]
+            act = self.activations.get_batch(g_node.act)
+            agg = self.aggregations.get_batch(g_node.agg)
+            batch_program.append((slot, np.array(source_slots, dtype=int), np.array(weights)[:, np.newaxis], bias,
+                                  response, act, agg))
+        return batch_program
+
+    def activate_batch(self, inputs):
+        inputs = np.asarray(inputs, dtype=float)
+        if inputs.ndim != 2 or inputs.shape[1] != len(self.input_slots):
+            raise RuntimeError("Unexpected number of inputs")
+
+        if self.batch_program is None:
+            self.batch_program = self._compile_batch_program()
+
+        # Node output values as rows with one column per sample
+        values = np.zeros((len(self.node_order), inputs.shape[0]))
+        values[self.input_slots] = inputs.T
+
+        try:
+            with np.errstate(over='raise', divide='raise', invalid='raise'):
+                for (slot, source_slots, weights, bias, response, activation, aggregation) in self.batch_program:
+                    if len(source_slots):
+                        signals = values[source_slots] * weights
+                        values[slot] = activation((aggregation(signals) * response) + bias)
+        except (FloatingPointError, OverflowError, ValueError):
+            self.is_damaged = True
+            return np.zeros((inputs.shape[0], len(self.output_slots)))
+        return values[self.output_slots].T
 
     def reset(self, hard=False):
-        for node_dict in self.nodes.values():
-            for p_node in node_dict.values():
-                p_node.outgoing = 0.0
-                p_node.activated = False
+        for slot in range(len(self.values)):
+            self.values[slot] = 0.0
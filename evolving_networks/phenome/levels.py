@@ -0,0 +1,88 @@
+import numpy as np
+
+# Aggregations expressible as a segmented reduction over concatenated incoming signals
+_reduce_functions = {'sum': np.add, 'product': np.multiply, 'max': np.maximum, 'min': np.minimum}
+
+
+class Level(object):
+    """
+    Nodes of equal topological depth evaluated together over a value matrix with one row per slot and one column per
+    sample. Incoming signals are gathered at once and reduced per aggregation as contiguous segments, levels of summing
+    nodes reduce to a single dense matrix product when the number of value rows is given.
+    """
+
+    def __init__(self, entries, nb_rows=None):
+        # Entries are (aggregation, activation, target, sources, weights, bias, response), grouped by aggregation
+        entries.sort(key=lambda e: e[0])
+        counts = [len(e[3]) for e in entries]
+
+        self.targets = np.array([e[2] for e in entries], dtype=int)
+        self.sources = np.array([s for e in entries for s in e[3]], dtype=int)
+        self.weights = np.array([w for e in entries for w in e[4]])[:, np.newaxis]
+        self.bias = np.array([e[5] for e in entries])[:, np.newaxis]
+        self.response = np.array([e[6] for e in entries])[:, np.newaxis]
+        self.counts = np.array(counts, dtype=int)[:, np.newaxis]
+        self.starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(int)
+
+        # Contiguous node ranges sharing an aggregation and node positions sharing an activation
+        self.aggregation_groups = []
+        for idx, e in enumerate(entries):
+            if self.aggregation_groups and self.aggregation_groups[-1][0] == e[0]:
+                self.aggregation_groups[-1][2] = idx + 1
+            else:
+                self.aggregation_groups.append([e[0], idx, idx + 1])
+
+        activation_groups = {}
+        for idx, e in enumerate(entries):
+            activation_groups.setdefault(e[1], []).append(idx)
+        self.activation_groups = [(name, np.array(rows, dtype=int)) for name, rows in activation_groups.items()]
+
+        # Dense weight matrix over all value rows for levels made only of summing nodes
+        self.matrix = None
+        if nb_rows is not None and all(e[0] == 'sum' for e in entries):
+            self.matrix = np.zeros((len(entries), nb_rows))
+            np.add.at(self.matrix, (np.repeat(np.arange(len(entries)), counts), self.sources), self.weights[:, 0])
+
+    def _aggregate(self, values, aggregations):
+        if self.matrix is not None:
+            return np.dot(self.matrix, values)
+
+        signals = values[self.sources] * self.weights
+        aggregated = np.empty((len(self.targets), values.shape[1]))
+        for name, start, end in self.aggregation_groups:
+            e_start = self.starts[start]
+            e_end = self.starts[end - 1] + self.counts[end - 1, 0]
+            reduce_function = _reduce_functions.get('sum' if name == 'mean' else name)
+            if reduce_function is not None:
+                aggregated[start:end] = reduce_function.reduceat(signals[e_start:e_end],
+                                                                 self.starts[start:end] - e_start, axis=0)
+                if name == 'mean':
+                    aggregated[start:end] /= self.counts[start:end]
+            else:
+                aggregation = aggregations.get_batch(name)
+                for idx in range(start, end):
+                    aggregated[idx] = aggregation(signals[self.starts[idx]:self.starts[idx] + self.counts[idx, 0]])
+        return aggregated
+
+    def activate(self, values, activations, aggregations):
+        """
+        Activates level nodes in place
+        :return: Target rows of nodes whose activation overflowed, these are set to zero
+        """
+        aggregated = (self._aggregate(values, aggregations) * self.response) + self.bias
+        damaged = []
+        for name, rows in self.activation_groups:
+            activation = activations.get_batch(name)
+            try:
+                with np.errstate(over='raise', divide='raise', invalid='raise'):
+                    values[self.targets[rows]] = activation(aggregated[rows])
+            except (FloatingPointError, OverflowError, ValueError):
+                # Isolate the failing nodes so that only their networks are damaged
+                for row in rows:
+                    try:
+                        with np.errstate(over='raise', divide='raise', invalid='raise'):
+                            values[self.targets[row]] = activation(aggregated[row])
+                    except (FloatingPointError, OverflowError, ValueError):
+                        values[self.targets[row]] = 0.0
+                        damaged.append(self.targets[row])
+        return damaged
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+
+class Plan(object):
+    def __init__(self, node_order, input_slots, output_slots, entries):
+        # Node ids in activation order, the position of a node id is its value slot
+        self.node_order = node_order
+
+        # Value slots of input and output nodes in ascending node id order
+        self.input_slots = input_slots
+        self.output_slots = output_slots
+
+        # Topology of the activation program as (slot, source_slots, connection_ids)
+        self.entries = entries
+
+
+class PlanCache(object):
+    """
+    Least recently used cache of compiled phenome plans keyed by genome structural fingerprint, the exact connector and
+    node sets of the topology.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint):
+        plan = self.plans.get(fingerprint)
+        if plan is None:
+            self.misses += 1
+            return None
+        self.plans.move_to_end(fingerprint)
+        self.hits += 1
+        return plan
+
+    def put(self, fingerprint, plan):
+        self.plans[fingerprint] = plan
+        self.plans.move_to_end(fingerprint)
+        while len(self.plans) > self.max_size:
+            self.plans.popitem(last=False)
+
+    def clear(self):
+        self.plans.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.plans)
@@ -1,4 +1,7 @@
-from evolving_networks.phenome.helpers import calc_required_cyclic_depth, calc_neural_cyclic_path
+import numpy as np
+
+from evolving_networks.phenome.helpers import calc_incoming_connections, calc_activation_order
+from evolving_networks.phenome.levels import Level
 from evolving_networks.phenome.proteins.node import Node
 
 from evolving_networks.phenome.phenome import Phenome
@@ -13,35 +16,43 @@ class RecurrentNetwork(Phenome):
         # Node to type mappings
         self.node_to_type = {}
 
-        # Neural activation pathways of output nodes
-        self.neuronal_paths = {}
+        # Ordered neural activation pathway of output nodes
+        self.activation_order = []
 
         # Node protein collections
         self.nodes = {'input': {}, 'hidden': {}, 'output': {}}
 
+        # Function registries and lazily compiled vectorized program for sequence activation
+        self.activations = None
+        self.aggregations = None
+        self.sequence_order = None
+        self.sequence_levels = None
+
+        # Sequence state as current rows followed by previous tick rows, one column per environment
+        self.state = None
+
         # Flag for genome removal
         self.is_damaged = False
 
     def initialize(self, activations, aggregations):
-        # Set of nodes mandatory for output activation
-        required_nodes = set()
+        self.activations = activations
+        self.aggregations = aggregations
+        self.sequence_order = None
+        self.sequence_levels = None
+        self.state = None
 
-        # The complete list of required (enabled) connections as (id, source_id, target_id)
-        enabled_connections = [(connection.id, connection.source_id, connection.target_id) for connection in
-                               self.genome.connections.values() if connection.enabled]
+        # Incoming enabled connections of every node
+        incoming = calc_incoming_connections(self.genome.connections.values())
+        node_ids, nodes = self.genome.node_ids, self.genome.nodes
+        self.activation_order = calc_activation_order(sorted(node_ids['output']), incoming)
 
-        depth = calc_required_cyclic_depth(self.genome.node_ids['all'], enabled_connections)
-        for n_id in self.genome.node_ids['output']:
-            path = []
-            searching_for = set()
-            calc_neural_cyclic_path(depth, n_id, path, searching_for)
-            required_nodes.update(path)
-            self.neuronal_paths[n_id] = path
+        # Set of nodes mandatory for output activation, input nodes are always kept so that inputs map by position
+        required_nodes = set(self.activation_order).union(node_ids['input'])
 
         # Create required node proteins
-        for n_id in required_nodes:
+        for n_id in sorted(required_nodes):
             # Node gene
-            g_node = self.genome.nodes[n_id]
+            g_node = nodes[n_id]
             act = activations.get(g_node.act)
             agg = aggregations.get(g_node.agg)
 
@@ -49,20 +60,12 @@ class RecurrentNetwork(Phenome):
             p_node = Node(n_id, g_node.type, g_node.bias, g_node.res, act, agg)
 
             # A list of incoming weighted signals
-            incoming = []
-
-            for (c_id, source_id, target_id) in enabled_connections:
-
-                # If target is required node then we have incoming connection dependency
-                if target_id == n_id:
-                    incoming.append((source_id, self.genome.connections[c_id].weight))
-
-            p_node.incoming = incoming
+            p_node.incoming = [(c.source_id, c.weight) for c in incoming.get(n_id, [])]
             self.nodes[p_node.type][n_id] = p_node
             self.node_to_type[n_id] = p_node.type
 
     def activate(self, inputs):
-        if len(self.genome.node_ids['input']) != len(inputs):
+        if len(self.nodes['input']) != len(inputs):
             raise RuntimeError("Unexpected number of inputs")
 
         # Assigning incoming to input node proteins
@@ -74,31 +77,103 @@ class RecurrentNetwork(Phenome):
         self.reset()
 
         try:
-            # Activating ordered neural pathways
-            for path in self.neuronal_paths.values():
-                for n_id in path:
-                    # Get node protein
-                    p_node = self.nodes[self.node_to_type[n_id]][n_id]
-
-                    # Only do if node isn't activated already
-                    if p_node.activated is False:
-
-                        # Special case activation for input nodes
-                        if p_node.type == 'input':
-                            p_node.activate(p_node.incoming)
-                        else:
-                            # Creating weighted incoming signals
-                            incoming = [self.nodes[self.node_to_type[i_id]][i_id].outgoing * weight for (i_id, weight)
-                                        in p_node.incoming]
-                            p_node.activate(incoming)
+            # Activating ordered neural pathway
+            for n_id in self.activation_order:
+                # Get node protein
+                p_node = self.nodes[self.node_to_type[n_id]][n_id]
+
+                # Only do if node isn't activated already
+                if p_node.activated is False:
+
+                    # Special case activation for input nodes
+                    if p_node.type == 'input':
+                        p_node.activate(p_node.incoming)
+                    else:
+                        # Creating weighted incoming signals
+                        incoming = [self.nodes[self.node_to_type[i_id]][i_id].outgoing * weight for (i_id, weight)
+                                    in p_node.incoming]
+                        p_node.activate(incoming)
         except (OverflowError, ValueError):
             self.is_damaged = True
             return [0.0 for _ in self.nodes['output'].values()]
         return [p_node.outgoing for p_node in self.nodes['output'].values()]
 
+    def _compile_sequence_program(self):
+        # Input nodes always occupy the leading slots so that inputs map by position
+        input_ids = sorted(self.nodes['input'])
+        node_order = input_ids + [n_id for n_id in self.activation_order if n_id not in self.nodes['input']]
+        slots = {n_id: slot for slot, n_id in enumerate(node_order)}
+        nb_slots = len(node_order)
+
+        # Sources activated earlier in the tick are read from current rows, sources closing a cycle from previous rows
+        depth, levels, nodes = [0] * nb_slots, {}, self.genome.nodes
+        for slot in range(len(input_ids), nb_slots):
+            p_node = self.nodes[self.node_to_type[node_order[slot]]][node_order[slot]]
+            g_node = nodes[p_node.id]
+            rows, weights = [], []
+            for (source_id, weight) in p_node.incoming:
+                if slots[source_id] < slot:
+                    depth[slot] = max(depth[slot], depth[slots[source_id]])
+                    rows.append(slots[source_id])
+                else:
+                    rows.append(nb_slots + slots[source_id])
+                weights.append(weight)
+            depth[slot] += 1
+
+            # Nodes without incoming signals keep their zero output
+            if rows:
+                levels.setdefault(depth[slot], []).append(
+                    (g_node.agg, g_node.act, slot, rows, weights, p_node.bias, p_node.response))
+
+        self.sequence_order = node_order
+        self.sequence_levels = [Level(levels[d], 2 * nb_slots) for d in sorted(levels)]
+
+    def activate_sequence_batch(self, inputs):
+        """
+        Advances independent copies of the network over a sequence, one copy per environment
+        :return: Outputs shaped (n_steps, n_environments, n_outputs) for inputs shaped (n_steps, n_environments, n_inputs)
+        """
+        inputs = np.asarray(inputs, dtype=float)
+        if inputs.ndim != 3 or inputs.shape[2] != len(self.nodes['input']):
+            raise RuntimeError("Unexpected number of inputs")
+
+        if self.sequence_levels is None:
+            self._compile_sequence_program()
+
+        nb_slots = len(self.sequence_order)
+        if self.state is None or self.state.shape[1] != inputs.shape[1]:
+            self.state = np.zeros((2 * nb_slots, inputs.shape[1]))
+
+        values = self.state
+        input_slots = list(range(inputs.shape[2]))
+        output_slots = [self.sequence_order.index(n_id) for n_id in self.nodes['output']]
+        outputs = np.empty((inputs.shape[0], inputs.shape[1], len(output_slots)))
+        with np.errstate(all='ignore'):
+            for step in range(inputs.shape[0]):
+                values[nb_slots:] = values[:nb_slots]
+                values[input_slots] = inputs[step].T
+                for level in self.sequence_levels:
+                    if level.activate(values, self.activations, self.aggregations):
+                        self.is_damaged = True
+                        return np.zeros(outputs.shape)
+                outputs[step] = values[output_slots].T
+        return outputs
+
+    def activate_sequence(self, inputs):
+        """
+        Advances the network over a sequence keeping state between calls, independently of activate
+        :return: Outputs shaped (n_steps, n_outputs) for inputs shaped (n_steps, n_inputs)
+        """
+        inputs = np.asarray(inputs, dtype=float)
+        if inputs.ndim != 2:
+            raise RuntimeError("Unexpected number of inputs")
+        return self.activate_sequence_batch(inputs[:, np.newaxis, :])[:, 0, :]
+
     def reset(self, hard=False):
         for node_dict in self.nodes.values():
             for p_node in node_dict.values():
                 if hard:
                     p_node.outgoing = 0.0
                 p_node.activated = False
+        if hard:
+            self.state = None
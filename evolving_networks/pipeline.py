@@ -0,0 +1,90 @@
+"""
+# ==============
+# References
+# ==============
+
+[1] https://docs.python.org/3/library/concurrent.futures.html#concurrent.futures.wait
+
+"""
+
+import concurrent.futures
+from itertools import chain
+
+from evolving_networks.population import Population
+
+
+class Pipeline(Population):
+    """
+    Population overlapping reproduction, evaluation and speciation within a generation.
+    Every off spring is submitted to the evaluator (see ParallelEvaluator and SerialEvaluator) as soon as it is bred,
+    evaluated genomes are handed to speciation.prepare in batches of prepare_size while the rest of the generation is
+    still bred and evaluated, speciate then only computes the distances left. Reporter hooks time every phase, the
+    evaluation phase starts along with reproduction as both overlap.
+    """
+
+    def __init__(self, reproduction, speciation, regulation, reporter, prepare_size=32):
+        super(Pipeline, self).__init__(reproduction, speciation, regulation, reporter)
+        self.prepare_size = prepare_size
+        self.evaluator = None
+
+    def initialize(self, evaluator, config):
+        self.evaluator = evaluator
+        super(Pipeline, self).initialize(evaluator.evaluate, config)
+
+    def _off_springs(self):
+        species = self.speciation.species
+        elites = self.reproduction.elites(species, self.config)
+        mating_plan = self.reproduction.mating_plan(species, self.config)
+        return chain(elites, (self.reproduction.breed(parent_1, parent_2, self.regulation, self.generation, self.config)
+                              for parent_1, parent_2 in mating_plan))
+
+    def _collect(self, done, pending, evaluated):
+        for future in done:
+            genome = pending.pop(future)
+            genome.fitness, genome.is_damaged = future.result()
+            if not genome.is_damaged:
+                evaluated.append(genome)
+
+        if len(evaluated) < self.prepare_size:
+            return evaluated
+        self.speciation.prepare(evaluated, self.config)
+        return []
+
+    def _reproduce_and_evaluate(self):
+        self.reporter.pre_reproduction()
+        self.reporter.pre_evaluation()
+        self.innovations.next_generation()
+
+        # Off springs being evaluated keyed by their future, and evaluated genomes not yet prepared for speciation
+        pending, evaluated = {}, []
+        fingerprints, hits = {}, 0
+        self.population = {}
+        for g in self._off_springs():
+            self.population[g.id] = g
+            if self.config.neat.fitness_memoization:
+                fingerprints[g.id] = g.parameter_fingerprint()
+                if fingerprints[g.id] in self.fitness_memo:
+                    g.fitness = self.fitness_memo[fingerprints[g.id]]
+                    evaluated.append(g)
+                    hits += 1
+                    continue
+
+            pending[self.evaluator.submit(g, self.config)] = g
+            if len(self.population) % self.prepare_size == 0:
+                done, _ = concurrent.futures.wait(pending, timeout=0)  # [1]
+                evaluated = self._collect(done, pending, evaluated)
+
+        assert len(self.population) == self.population_size
+        self.reporter.post_reproduction()
+
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            evaluated = self._collect(done, pending, evaluated)
+        if evaluated:
+            self.speciation.prepare(evaluated, self.config)
+        self.reporter.post_evaluation()
+
+        if self.config.neat.fitness_memoization:
+            self.fitness_memo = {fingerprints[g_id]: member.fitness for g_id, member in self.population.items() if
+                                 not member.is_damaged}
+            self.reporter.cache_statistics('fitness', hits, len(self.population) - hits)
@@ -1,5 +1,6 @@
+from evolving_networks.genome.innovation import InnovationTracker
 from evolving_networks.math_util import mean
-from evolving_networks.math_util import stat_functions, normalize
+from evolving_networks.math_util import stat_functions
 
 
 class Population(object):
@@ -17,6 +18,10 @@ class Population(object):
         self.fitness_function = None
         self.fitness_criterion = None
 
+        # Fitness of the last evaluated generation keyed by genome parameter fingerprint
+        self.fitness_memo = {}
+        self.innovations = None
+
     def initialize(self, fitness_function, config):
         self.config = config
         self.population_size = config.neat.population_size
@@ -25,35 +30,75 @@ class Population(object):
         if self.fitness_criterion is None and not config.neat.no_fitness_termination:
             raise RuntimeError('Unexpected fitness criterion [{}]'.format(config.neat.fitness_criterion))
 
-        self.population = self.reproduction.populate(self.population_size, self.generation, config)
-        fitness_function(list(self.population.items()), config)
+        self.innovations = InnovationTracker(config.genome.innovation_retention, config.genome.innovation_archive_size)
+        self.reproduction.innovations = self.innovations
 
-        damaged_members = []
-        members_fitness = []
-        for g_id, member in self.population.items():
-            if member.is_damaged:
-                damaged_members.append(g_id)
-            else:
-                members_fitness.append(member.fitness)
+        self.population = self.reproduction.populate(self.population_size, self.generation, config)
+        self._evaluate()
 
-        for g_id in damaged_members:
+        for g_id in [g_id for g_id, member in self.population.items() if member.is_damaged]:
             del self.population[g_id]
 
-        min_fitness, max_fitness = min(members_fitness), max(members_fitness)
-        if min_fitness == max_fitness:
-            for member in self.population.values():
-                member.adjusted_fitness = 0.0
-        else:
-            for member in self.population.values():
-                member.adjusted_fitness = normalize(min_fitness, max_fitness, member.fitness, 0.0, 1.0)
-
-        self.speciation.speciate(self.population, self.generation, config)
-        self.speciation.reset_specie_stats()
-        self.speciation.sort_specie_genomes()
-        self.speciation.calc_best_stats()
-        self.speciation.calc_specie_stats(self.generation, self.population_size, self.config)
+        for member in self.population.values():
+            if self.best_genome is None or member.fitness > self.best_genome.fitness:
+                self.best_genome = member
+
+        self.speciation.speciate_population(self.population, self.generation, self.population_size, config)
         self.generation += 1
 
+    def _evaluate(self):
+        if not self.config.neat.fitness_memoization:
+            self.fitness_function(list(self.population.items()), self.config)
+            return 0, len(self.population)
+
+        # Genomes expressing an already evaluated network (e.g. unchanged elites) reuse its fitness
+        fingerprints, pending = {}, []
+        for g_id, member in self.population.items():
+            fingerprints[g_id] = member.parameter_fingerprint()
+            if fingerprints[g_id] in self.fitness_memo:
+                member.fitness = self.fitness_memo[fingerprints[g_id]]
+            else:
+                pending.append((g_id, member))
+
+        if pending:
+            self.fitness_function(pending, self.config)
+
+        self.fitness_memo = {fingerprints[g_id]: member.fitness for g_id, member in self.population.items() if
+                             not member.is_damaged}
+        return len(self.population) - len(pending), len(pending)
+
+    def _reproduce_and_evaluate(self):
+        self.reporter.pre_reproduction()
+        self.innovations.next_generation()
+        self.population = self.reproduction.reproduce(species=self.speciation.species,
+                                                      generation=self.generation, regulation=self.regulation,
+                                                      population_size=self.population_size, config=self.config)
+        self.reporter.post_reproduction()
+        self.reporter.pre_evaluation()
+        hits, misses = self._evaluate()
+        self.reporter.post_evaluation()
+        if self.config.neat.fitness_memoization:
+            self.reporter.cache_statistics('fitness', hits, misses)
+
+    def immigrate(self, compact_genomes):
+        """
+        Replaces the worst members with genomes of other populations keeping their fitness, e.g. migrants between
+        islands (see Islands), and speciates the population again
+        """
+        generation = self.generation - 1
+        immigrants = [self.reproduction.adopt(compact_genome, generation, self.config) for compact_genome in
+                      compact_genomes]
+        worst_members = [member for member in sorted(self.population.values()) if member is not self.best_genome]
+        for member in worst_members[:len(immigrants)]:
+            del self.population[member.id]
+
+        for immigrant in immigrants:
+            self.population[immigrant.id] = immigrant
+            if immigrant.fitness > self.best_genome.fitness:
+                self.best_genome = immigrant
+
+        self.speciation.speciate_population(self.population, generation, self.population_size, self.config)
+
     def fit(self, n=None):
         if self.config.neat.no_fitness_termination and (n is None):
             raise RuntimeError('Cannot have no generational limit with no fitness termination')
@@ -62,14 +107,7 @@ class Population(object):
         while n is None or k < n:
             k += 1
             self.reporter.start_generation(self.generation)
-            self.reporter.pre_reproduction()
-            self.population = self.reproduction.reproduce(species=self.speciation.species,
-                                                          generation=self.generation, regulation=self.regulation,
-                                                          population_size=self.population_size, config=self.config)
-            self.reporter.post_reproduction()
-            self.reporter.pre_evaluation()
-            self.fitness_function(list(self.population.items()), self.config)
-            self.reporter.post_evaluation()
+            self._reproduce_and_evaluate()
 
             best = None
             damaged_members = []
@@ -90,20 +128,8 @@ class Population(object):
             if self.best_genome is None or best.fitness > self.best_genome.fitness:
                 self.best_genome = best
 
-            min_fitness, max_fitness = min(members_fitness), max(members_fitness)
-            if min_fitness == max_fitness:
-                for member in self.population.values():
-                    member.adjusted_fitness = 0.0
-            else:
-                for member in self.population.values():
-                    member.adjusted_fitness = normalize(min_fitness, max_fitness, member.fitness, 0.0, 1.0)
-
             self.reporter.pre_speciation()
-            self.speciation.speciate(self.population, self.generation, self.config)
-            self.speciation.reset_specie_stats()
-            self.speciation.sort_specie_genomes()
-            self.speciation.calc_best_stats()
-            self.speciation.calc_specie_stats(self.generation, self.population_size, self.config)
+            self.speciation.speciate_population(self.population, self.generation, self.population_size, self.config)
             self.reporter.post_speciation(self.speciation, self.regulation, members_complexity)
 
             if not self.config.neat.no_fitness_termination:
@@ -115,4 +141,7 @@ class Population(object):
                                            current_best=self.speciation.best_genome)
             self.reporter.end_generation()
             self.generation += 1
+
+        # Distance worker threads are started again by the next speciation
+        self.speciation.close()
         return self.best_genome
@@ -23,6 +23,9 @@ class Report(object):
     def post_evaluation(self):
         pass
 
+    def cache_statistics(self, name, hits, misses):
+        pass
+
     def pre_reproduction(self):
         pass
 
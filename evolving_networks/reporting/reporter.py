@@ -36,6 +36,10 @@ class Reporter(object):
         for r in self.reporters:
             r.post_evaluation()
 
+    def cache_statistics(self, name, hits, misses):
+        for r in self.reporters:
+            r.cache_statistics(name, hits, misses)
+
     def pre_reproduction(self):
         for r in self.reporters:
             r.pre_reproduction()
@@ -18,6 +18,8 @@ class Statistics(Report):
         self.min_complexity = []
         self.mean_complexity = []
         self.elapsed_generation_time = []
+        self.cache_hits = {}
+        self.cache_misses = {}
 
     def start_generation(self, generation):
         self.generation_start_time = time.time()
@@ -64,6 +66,10 @@ class Statistics(Report):
     def post_evaluation(self):
         pass
 
+    def cache_statistics(self, name, hits, misses):
+        self.cache_hits.setdefault(name, []).append(hits)
+        self.cache_misses.setdefault(name, []).append(misses)
+
     def pre_reproduction(self):
         pass
 
@@ -36,6 +36,9 @@ class StdOut(Report):
     def post_evaluation(self):
         print("Elapsed evaluation time: {0:.2f} sec ".format(time.time() - self.evaluation_start_time))
 
+    def cache_statistics(self, name, hits, misses):
+        print("{0} cache hits: {1} misses: {2}".format(name.title(), hits, misses))
+
     def pre_reproduction(self):
         self.reproduction_start_time = time.time()
 
@@ -1,12 +1,55 @@
 from itertools import count
 
+from evolving_networks.errors import InvalidConfigurationError
+from evolving_networks.genome.innovation import InnovationTracker
+from evolving_networks.genome.packed import PackedGenome
+
 
 class Factory(object):
     def __init__(self):
         self._genome_indexer = count(0)
+        # Replaced by the tracker of the population using this reproduction
+        self.innovations = InnovationTracker()
+        # Genomes unpacked from packed parents, keyed by id of the packed genome they were unpacked from
+        self._unpacked = {}
 
     def populate(self, population_size, generation, config):
         raise NotImplementedError()
 
     def reproduce(self, species, regulation, generation, population_size, config):
         pass
+
+    def adopt(self, compact_genome, generation, config):
+        raise NotImplementedError()
+
+    def elites(self, species, config):
+        raise NotImplementedError()
+
+    def mating_plan(self, species, config):
+        raise NotImplementedError()
+
+    def breed(self, parent_1, parent_2, regulation, generation, config):
+        raise NotImplementedError()
+
+    def _store(self, genome, config):
+        """
+        Population member of a genome in the storage of the DefaultGenome storage option
+        :return: The genome itself for 'genome' storage, its PackedGenome for 'packed' storage
+        """
+        if config.genome.storage == 'genome':
+            return genome
+        elif config.genome.storage == 'packed':
+            return PackedGenome(config.genome).from_genome(genome)
+        raise InvalidConfigurationError('Unexpected genome storage [{}]'.format(config.genome.storage))
+
+    def _unpack(self, genome):
+        """
+        Genome to mate or clone, packed parents are unpacked once per mating plan
+        :return: The genome itself or the Genome unpacked from a PackedGenome
+        """
+        if not isinstance(genome, PackedGenome):
+            return genome
+        if id(genome) not in self._unpacked:
+            # The packed genome is kept alongside so that its id is not reused while cached
+            self._unpacked[id(genome)] = (genome, genome.to_genome())
+        return self._unpacked[id(genome)][1]
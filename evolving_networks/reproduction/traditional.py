@@ -4,133 +4,309 @@
 # ==============
 
 [1] https://stackoverflow.com/questions/19286657/index-all-except-one-item-in-python
+[2] https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
 
 """
 
+import concurrent.futures
+import random
+from types import SimpleNamespace
+
 import numpy as np
 
 from evolving_networks.genome.genome import Genome
+from evolving_networks.genome.mutation import mutate_parameters
 from evolving_networks.math_util import probabilistic_round
 from evolving_networks.reproduction.factory import Factory
 
+# Per worker process state, set once by the pool initializer
+_worker_config = None
+
+
+def _initialize_worker(config):
+    global _worker_config
+    _worker_config = config
+
+
+def _reproduce_chunk(chunk):
+    return _build_off_springs(*chunk, config=_worker_config)
+
+
+def _build_off_springs(compact_parents, mating_plan, innovations, regulation, generation, config):
+    """
+    Builds off springs of a mating plan chunk, every off spring from its own seed so that results do not depend on the
+    process or chunk building it. The chunk's fork of the tracker knows no connectors, all connectors created in the
+    chunk get provisional ids resolved when the fork is merged.
+    :return: Compact off springs and the connectors they created with their provisional innovation ids
+    """
+    parents = [Genome(None, None, config.genome, innovations).from_compact(compact) for compact in compact_parents]
+    off_springs = []
+    for p1_idx, p2_idx, member_id, seed in mating_plan:
+        random.seed(seed)
+        np.random.seed(seed)
+        g = Genome(member_id, generation, config.genome, innovations)
+        if p2_idx is None:
+            g.crossover_asexual(parents[p1_idx])
+            g.mutate_structure(regulation, config)
+            mutate_parameters([g], config, np.random.default_rng(seed))
+        else:
+            g.crossover_sexual(parents[p1_idx], parents[p2_idx], config)
+        off_springs.append(g.to_compact())
+    return off_springs, innovations.provisional()
+
 
 class Traditional(Factory):
-    def __init__(self):
+    """
+    With num_workers set off springs are built from per off spring seeds drawn from the reproduction's generator, on
+    a pool of worker processes or in this process for a single worker. Results are identical for any number of
+    workers and chunk size. Without it off springs are built in this process and their parameters mutated together.
+    Without a seed the generator is seeded from the global numpy random state on first use, so runs seeded through
+    np.random.seed stay reproducible.
+    """
+
+    def __init__(self, seed=None, num_workers=None, chunk_size=None):
         super(Traditional, self).__init__()
         self.ancestors = set()
+        self.seed = seed
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+
+        self._rng = None
+        self._config = None
+        self._executor = None
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            self._rng = np.random.default_rng(np.random.randint(2 ** 32) if self.seed is None else self.seed)
+        return self._rng
 
     def populate(self, population_size, generation, config):
         population = {}
         for _ in range(population_size):
             member_id = next(self._genome_indexer)
             assert member_id not in self.ancestors
-            g = Genome(member_id, generation, config.genome)
+            g = Genome(member_id, generation, config.genome, self.innovations)
             g.initialize(config.node, config.connection)
-            population[member_id] = g
+            population[member_id] = self._store(g, config)
             self.ancestors.add(member_id)
         return population
 
-    def _reproduce_off_springs(self, species, regulation, generation, config):
-        off_springs = []
-        non_zero_species = 0
-        reproduce_probs, species_probs = {}, []
-        for idx, (s_id, specie) in enumerate(species.items()):
-            if specie.survivors != 0:
-                non_zero_species += 1
+    def mating_plan(self, species, config):
+        """
+        Parents of every off spring of the generation, drawn per species in a few batched calls
+        :return: List of (parent_1, parent_2) pairs, parent_2 is None for asexual off springs
+        """
+        self._unpacked = {}
+        s_ids = list(species.keys())
+        survivors = np.array([specie.survivors for specie in species.values()], dtype=float)
+        non_zero_species = np.count_nonzero(survivors)
+        assert non_zero_species != 0
+        species_probs = survivors / np.sum(survivors)
 
-            members_fitness_sum = sum(specie.members_fitness[:specie.survivors])
+        reproduce_probs = {}
+        for s_id, specie in species.items():
+            members_fitness = np.array(specie.members_fitness[:specie.survivors], dtype=float)
+            members_fitness_sum = np.sum(members_fitness)
             if members_fitness_sum == 0.0:
-                p = np.array([1.0] * specie.survivors) / specie.survivors
-                reproduce_probs[s_id] = p.tolist()
+                reproduce_probs[s_id] = np.full(specie.survivors, 1.0 / max(specie.survivors, 1))
             else:
-                p = np.array(specie.members_fitness[:specie.survivors]) / members_fitness_sum
-                reproduce_probs[s_id] = p.tolist()
-
-            species_probs.append(specie.survivors)
-
-        assert non_zero_species != 0
-        species_probs_sum = sum(species_probs)
-        assert species_probs_sum != 0
-        species_probs = np.array(species_probs) / species_probs_sum
+                reproduce_probs[s_id] = members_fitness / members_fitness_sum
 
+        plan = []
         for s_idx, (s_id, specie) in enumerate(species.items()):
-            for _ in range(specie.off_spring_asexual):
-                member_parent_1 = np.random.choice(specie.members[:specie.survivors], 1, p=reproduce_probs[s_id])[0]
-                member_id = next(self._genome_indexer)
-                assert member_id not in self.ancestors
-                g = Genome(member_id, generation, config.genome)
-                g.crossover_asexual(member_parent_1)
-                g.mutate(regulation, config)
-                off_springs.append(g)
-
-            inter_species_matings = 0 if non_zero_species == 1 else probabilistic_round(
-                specie.off_spring_sexual * config.species.inter_species_mating_rate)
-            intra_species_matings = specie.off_spring_sexual - inter_species_matings
+            members, p = specie.members[:specie.survivors], reproduce_probs[s_id]
+            if specie.off_spring_asexual > 0:
+                plan.extend((members[m_idx], None) for m_idx in self.rng.choice(len(p), specie.off_spring_asexual, p=p))
 
-            for _ in range(inter_species_matings):
-                s_id_1 = s_id
-                member_parent_1 = np.random.choice(species[s_id_1].members[:species[s_id_1].survivors], 1,
-                                                   p=reproduce_probs[s_id_1])[0]
+            inter_species_matings = 0
+            if non_zero_species != 1:
+                expected_matings = specie.off_spring_sexual * config.species.inter_species_mating_rate
+                inter_species_matings = probabilistic_round(expected_matings, self.rng)
+            intra_species_matings = specie.off_spring_sexual - inter_species_matings
 
-                species_probs_revised = np.array([0.0 if i == s_idx else p for i, p in enumerate(species_probs)])
+            if inter_species_matings > 0:
+                m1_indices = self.rng.choice(len(p), inter_species_matings, p=p)
+                species_probs_revised = species_probs.copy()
+                species_probs_revised[s_idx] = 0.0
                 species_probs_revised = species_probs_revised / np.sum(species_probs_revised)
-                s_id_2 = np.random.choice(list(species.keys()), 1, p=species_probs_revised)[0]
-
-                member_parent_2 = np.random.choice(species[s_id_2].members[:species[s_id_2].survivors], 1,
-                                                   p=reproduce_probs[s_id_2])[0]
-
-                member_id = next(self._genome_indexer)
-                assert member_id not in self.ancestors
-                g = Genome(member_id, generation, config.genome)
-                g.crossover_sexual(member_parent_1, member_parent_2, config)
-                off_springs.append(g)
-
-            for _ in range(intra_species_matings):
-                if specie.survivors == 1:
-                    member_parent_1 = np.random.choice(specie.members[:specie.survivors], 1, p=reproduce_probs[s_id])[0]
-                    member_id = next(self._genome_indexer)
-                    assert member_id not in self.ancestors
-                    g = Genome(member_id, generation, config.genome)
-                    g.crossover_asexual(member_parent_1)
-                    g.mutate(regulation, config)
-                    off_springs.append(g)
+                s2_indices = self.rng.choice(len(s_ids), inter_species_matings, p=species_probs_revised)
+
+                # Partners drawn per partner species
+                m2_indices = np.empty(inter_species_matings, dtype=np.int64)
+                for s2_idx in np.unique(s2_indices):
+                    p2 = reproduce_probs[s_ids[s2_idx]]
+                    m2_indices[s2_indices == s2_idx] = self.rng.choice(len(p2), np.sum(s2_indices == s2_idx), p=p2)
+
+                for m1_idx, s2_idx, m2_idx in zip(m1_indices, s2_indices, m2_indices):
+                    specie_2 = species[s_ids[s2_idx]]
+                    plan.append((members[m1_idx], specie_2.members[:specie_2.survivors][m2_idx]))
+
+            if intra_species_matings > 0:
+                m1_indices = self.rng.choice(len(p), intra_species_matings, p=p)
+                if np.count_nonzero(p) == 1:
+                    # Only one member can be drawn, self mating falls back to asexual reproduction
+                    plan.extend((members[m1_idx], None) for m1_idx in m1_indices)
                 else:
-                    m1_idx = np.random.choice(range(specie.survivors), 1, p=reproduce_probs[s_id])[0]
-                    member_parent_1 = specie.members[m1_idx]
-                    reproduce_probs_revised = np.array(
-                        [0.0 if i == m1_idx else p for i, p in enumerate(reproduce_probs[s_id])])
-                    reproduce_probs_revised_sum = np.sum(reproduce_probs_revised)
-                    if reproduce_probs_revised_sum == 0.0:
-                        member_id = next(self._genome_indexer)
-                        assert member_id not in self.ancestors
-                        g = Genome(member_id, generation, config.genome)
-                        g.crossover_asexual(member_parent_1)
-                        g.mutate(regulation, config)
-                        off_springs.append(g)
-                    else:
-                        reproduce_probs_revised = reproduce_probs_revised / reproduce_probs_revised_sum
-                        m2_idx = np.random.choice(range(specie.survivors), 1, p=reproduce_probs_revised)[0]
-                        member_parent_2 = specie.members[m2_idx]
-                        member_id = next(self._genome_indexer)
-                        assert member_id not in self.ancestors
-                        g = Genome(member_id, generation, config.genome)
-                        g.crossover_sexual(member_parent_1, member_parent_2, config)
-                        off_springs.append(g)
+                    m2_indices = self._draw_partners(p, m1_indices)
+                    plan.extend((members[m1_idx], members[m2_idx]) for m1_idx, m2_idx in zip(m1_indices, m2_indices))
+        return plan
+
+    def _draw_partners(self, p, m1_indices):
+        """
+        Inverse transform sampling of partners from p with the probability of each first parent removed
+        :return: Partner index for every first parent
+        """
+        cumulative = np.cumsum(p)
+        before = cumulative[m1_indices] - p[m1_indices]
+        draws = self.rng.random(len(m1_indices)) * (cumulative[-1] - p[m1_indices])
+        draws = np.where(draws < before, draws, draws + p[m1_indices])
+        m2_indices = np.minimum(np.searchsorted(cumulative, draws, side='right'), len(p) - 1)
+
+        # Draws at interval boundaries lost to rounding are redrawn one at a time
+        for idx in np.flatnonzero((m2_indices == m1_indices) | (p[m2_indices] == 0.0)):
+            p_revised = p.copy()
+            p_revised[m1_indices[idx]] = 0.0
+            m2_indices[idx] = self.rng.choice(len(p), p=p_revised / np.sum(p_revised))
+        return m2_indices
 
+    def breed(self, parent_1, parent_2, regulation, generation, config):
+        """
+        Single off spring of a mating plan entry
+        :return: New genome, mutated when parent_2 is None
+        """
+        member_id = next(self._genome_indexer)
+        assert member_id not in self.ancestors
+        g = Genome(member_id, generation, config.genome, self.innovations)
+        if parent_2 is None:
+            g.crossover_asexual(self._unpack(parent_1))
+            g.mutate_structure(regulation, config)
+            mutate_parameters([g], config, self.rng)
+        else:
+            g.crossover_sexual(self._unpack(parent_1), self._unpack(parent_2), config)
+        return self._store(g, config)
+
+    def _reproduce_off_springs(self, species, regulation, generation, config):
+        if self.num_workers is not None:
+            return self._reproduce_off_springs_seeded(species, regulation, generation, config)
+
+        off_springs, mutants = [], []
+        for parent_1, parent_2 in self.mating_plan(species, config):
+            member_id = next(self._genome_indexer)
+            assert member_id not in self.ancestors
+            g = Genome(member_id, generation, config.genome, self.innovations)
+            if parent_2 is None:
+                g.crossover_asexual(self._unpack(parent_1))
+                g.mutate_structure(regulation, config)
+                mutants.append(g)
+            else:
+                g.crossover_sexual(self._unpack(parent_1), self._unpack(parent_2), config)
+            off_springs.append(g)
+
+        # Parameters of all asexual off springs are mutated together once their structure is settled
+        mutate_parameters(mutants, config, self.rng)
+        return [self._store(g, config) for g in off_springs]
+
+    def _reproduce_off_springs_seeded(self, species, regulation, generation, config):
+        plan = self.mating_plan(species, config)
+        seeds = self.rng.integers(2 ** 32, size=len(plan)).tolist()
+
+        parent_indices, compact_parents, mating_plan = {}, [], []
+        for (parent_1, parent_2), seed in zip(plan, seeds):
+            for parent in (parent_1, parent_2):
+                if parent is not None and id(parent) not in parent_indices:
+                    parent_indices[id(parent)] = len(compact_parents)
+                    compact_parents.append(parent.to_compact())
+            member_id = next(self._genome_indexer)
+            assert member_id not in self.ancestors
+            mating_plan.append((parent_indices[id(parent_1)], None if parent_2 is None else parent_indices[id(parent_2)],
+                                member_id, seed))
+
+        rates = SimpleNamespace(node_add_rate=regulation.node_add_rate, node_delete_rate=regulation.node_delete_rate,
+                                conn_add_rate=regulation.conn_add_rate, conn_delete_rate=regulation.conn_delete_rate)
+        chunk_size = self.chunk_size or max(1, len(mating_plan) // (self.num_workers * 4))
+        chunks = []
+        for i in range(0, len(mating_plan), chunk_size):
+            chunk_plan = mating_plan[i:i + chunk_size]
+            used = sorted(set(idx for entry in chunk_plan for idx in entry[:2] if idx is not None))
+            remap = {idx: c_idx for c_idx, idx in enumerate(used)}
+            chunk_plan = [(remap[p1_idx], None if p2_idx is None else remap[p2_idx], member_id, seed) for
+                          p1_idx, p2_idx, member_id, seed in chunk_plan]
+            chunks.append(([compact_parents[idx] for idx in used], chunk_plan, self.innovations.fork(), rates,
+                           generation))
+
+        if self.num_workers == 1:
+            # Per off spring seeding must not disturb the random state of the caller
+            random_state, np_random_state = random.getstate(), np.random.get_state()
+            results = [_build_off_springs(*chunk, config=config) for chunk in chunks]
+            random.setstate(random_state)
+            np.random.set_state(np_random_state)
+        else:
+            self._start(config)
+            results = list(self._executor.map(_reproduce_chunk, chunks))
+
+        # Forks are merged in plan order, innovation ids do not depend on the chunking
+        off_springs = []
+        for compact_off_springs, provisional in results:
+            mapping = self.innovations.merge(provisional)
+            for compact in compact_off_springs:
+                g = Genome(None, None, config.genome, self.innovations).from_compact(compact)
+                g.remap_innovations(mapping)
+                off_springs.append(self._store(g, config))
         return off_springs
 
+    def _start(self, config):
+        if self._executor is not None and self._config is config:
+            return
+
+        self.close()
+        self._config = config
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers,
+                                                                initializer=_initialize_worker,
+                                                                initargs=(config,))  # [2]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._config = None
+
+    def adopt(self, compact_genome, generation, config):
+        """
+        Genome of another population, e.g. a migrant between islands (see Population.immigrate). Its connections take
+        the innovation ids of this reproduction's tracker as other populations number connectors on their own.
+        :return: New genome with an id of this reproduction
+        """
+        member_id = next(self._genome_indexer)
+        assert member_id not in self.ancestors
+        g = Genome(member_id, generation, config.genome, self.innovations).from_compact(compact_genome)
+        g.id, g.birth_generation = member_id, generation
+        g.remap_innovations({c_id: g.innovations.get(c.source_id, c.target_id) for c_id, c in g.connections.items()})
+        return self._store(g, config)
+
+    def elites(self, species, config):
+        """
+        Clones of the elites of every specie, carried over unchanged to the next generation
+        :return: List of genomes keeping the ids of their elites
+        """
+        clones = []
+        for specie in species.values():
+            for elite in specie.members[:specie.elites]:
+                g = Genome(elite.id, elite.birth_generation, config.genome, self.innovations)
+                g.clone(self._unpack(elite))
+                clones.append(self._store(g, config))
+        return clones
+
     def reproduce(self, species, regulation, generation, population_size, config):
         new_population = {}
         off_springs = self._reproduce_off_springs(species, regulation, generation, config)
 
-        for specie in species.values():
-            for elite in specie.members[:specie.elites]:
-                g = Genome(elite.id, elite.birth_generation, config.genome)
-                g.clone(elite)
-                new_population[elite.id] = g
+        for g in self.elites(species, config):
+            new_population[g.id] = g
 
         for off_spring in off_springs:
             new_population[off_spring.id] = off_spring
 
         assert len(new_population) == population_size
+        self._unpacked = {}
         return new_population
@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+import numpy as np
+
+from evolving_networks.genome.packed import PackedGenome
+
+
+class DistanceEngine(object):
+    """
+    Computes blocks of genomic distances with array operations instead of one genome pair at a time.
+    Encoded genomes are sparse vectors, the innovation ids and weights of their connections sorted by innovation id and
+    laid out back to back in flat arrays, so memory grows with the number of connections and not with the number of
+    distinct innovations. Distances follow Genome.distance. With several workers genome rows are split in chunks
+    computed on a thread pool, as every row is computed independently results do not depend on the chunking. The pool
+    is started on first use, call close once speciation is over.
+    """
+
+    # Fewest genome rows per chunk, smaller chunks spend more time holding the interpreter lock than in NumPy
+    min_chunk_size = 128
+
+    def __init__(self, num_workers=1):
+        self.num_workers = num_workers
+        self._executor = None
+        self.rows = {}
+        self.innovations = None
+        self.weights = None
+        self.offsets = None
+        self.counts = None
+        self.last = None
+
+    def encode(self, genomes):
+        # Genomes are identified by object as representatives of past generations may share ids with new genomes
+        unique_genomes = []
+        self.rows = {}
+        for genome in genomes:
+            if id(genome) not in self.rows:
+                self.rows[id(genome)] = len(unique_genomes)
+                unique_genomes.append(genome)
+
+        counts = np.array([genome.complexity for genome in unique_genomes], dtype=np.int64)
+        if unique_genomes and all(isinstance(genome, PackedGenome) for genome in unique_genomes):
+            # Packed genomes already keep their innovation ids and weights as arrays
+            c_ids = np.concatenate([genome.connection_ids for genome in unique_genomes])
+            weights = np.concatenate([genome.weights for genome in unique_genomes])
+        else:
+            c_ids = np.fromiter(chain.from_iterable(genome.connections.keys() for genome in unique_genomes),
+                                dtype=np.int64, count=int(np.sum(counts)))
+            weights = np.fromiter((c.weight for genome in unique_genomes for c in genome.connections.values()),
+                                  dtype=float, count=len(c_ids))
+
+        rows = np.repeat(np.arange(len(unique_genomes)), counts)
+        order = np.lexsort((c_ids, rows))
+        self.innovations = c_ids[order]
+        self.weights = weights[order]
+        self.offsets = np.cumsum(counts) - counts
+        self.counts = counts
+
+        # Last innovation id of every genome, -1 for genomes without connections
+        self.last = np.full(len(unique_genomes), -1, dtype=np.int64)
+        nonempty = counts > 0
+        self.last[nonempty] = self.innovations[self.offsets[nonempty] + counts[nonempty] - 1]
+
+    def clear(self):
+        self.rows = {}
+        self.innovations = None
+        self.weights = None
+        self.offsets = None
+        self.counts = None
+        self.last = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def distances(self, genomes_1, genomes_2, config):
+        """
+        Distances between every pair of encoded genomes
+        :return: Distance matrix shaped (len(genomes_1), len(genomes_2))
+        """
+        rows_1 = np.array([self.rows[id(genome)] for genome in genomes_1], dtype=np.int64)
+        rows_2 = np.array([self.rows[id(genome)] for genome in genomes_2], dtype=np.int64)
+        return self._compute(rows_1, rows_2, config)
+
+    def _compute(self, rows_1, rows_2, config):
+        nb_chunks = min(self.num_workers, len(rows_1) // self.min_chunk_size)
+        if nb_chunks <= 1:
+            return self._distances(rows_1, rows_2, config)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        chunks = self._executor.map(lambda chunk: self._distances(chunk, rows_2, config),
+                                    np.array_split(rows_1, nb_chunks))
+        return np.vstack(list(chunks))
+
+    def _connections(self, rows):
+        """
+        Connections of genome rows laid out back to back
+        :return: Position of the owning row in rows, innovation ids and weights of every connection
+        """
+        counts = self.counts[rows]
+        owners = np.repeat(np.arange(len(rows)), counts)
+        positions = np.arange(int(np.sum(counts))) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions += np.repeat(self.offsets[rows], counts)
+        return owners, self.innovations[positions], self.weights[positions]
+
+    def _distances(self, rows_1, rows_2, config):
+        c1 = config.genome.compatibility_disjoint_contribution
+        c2 = config.genome.compatibility_excess_contribution
+        c3 = config.genome.compatibility_weight_contribution
+        wdiff_max = abs(config.connection.weight_min_value - config.connection.weight_max_value)
+
+        counts_1, counts_2 = self.counts[rows_1][:, np.newaxis], self.counts[rows_2][np.newaxis, :]
+        owners, innovations, weights = self._connections(rows_1)
+        last_1 = self.last[rows_1]
+
+        matched = np.zeros((len(rows_1), len(rows_2)), dtype=np.int64)
+        c_dist = np.zeros((len(rows_1), len(rows_2)))
+        nb_excess = np.zeros((len(rows_1), len(rows_2)), dtype=np.int64)
+        for idx, row in enumerate(rows_2):
+            start = self.offsets[row]
+            innovations_2 = self.innovations[start:start + self.counts[row]]
+            weights_2 = self.weights[start:start + self.counts[row]]
+
+            # Connections of the first genomes matched by innovation id in the sorted connections of the second
+            if len(innovations_2):
+                positions = np.minimum(np.searchsorted(innovations_2, innovations), len(innovations_2) - 1)
+                is_matched = innovations_2[positions] == innovations
+                wdiff = np.abs(weights - weights_2[positions]) / wdiff_max
+                matched[:, idx] = np.bincount(owners, weights=is_matched, minlength=len(rows_1))
+                c_dist[:, idx] = np.bincount(owners, weights=np.where(is_matched, wdiff, 0.0), minlength=len(rows_1))
+
+            # Unmatched innovations beyond the smaller of both last innovations are excess, the others disjoint
+            excess_threshold = np.minimum(last_1, self.last[row])
+            nb_excess[:, idx] = np.bincount(owners, weights=innovations > self.last[row], minlength=len(rows_1))
+            nb_excess[:, idx] += len(innovations_2) - np.searchsorted(innovations_2, excess_threshold, side='right')
+        nb_disjoint = counts_1 + counts_2 - (2 * matched) - nb_excess
+
+        max_counts = np.maximum(np.maximum(counts_1, counts_2), 1)
+        dist = (c1 * (nb_disjoint / max_counts)) + (c2 * (nb_excess / max_counts))
+        dist += c3 * np.where(matched > 0, c_dist / np.maximum(matched, 1), 0.0)
+
+        # Pairs where one genome lacks connections are fully excess, pairs where both lack them are equal
+        dist = np.where((counts_1 == 0) != (counts_2 == 0), c2 * 1.0, dist)
+        dist = np.where((counts_1 == 0) & (counts_2 == 0), 0.0, dist)
+        return dist / 3.0
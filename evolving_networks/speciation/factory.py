@@ -1,9 +1,14 @@
 from itertools import count
 
+import numpy as np
+
+from evolving_networks.math_util import normalize
+
 
 class Factory(object):
     def __init__(self):
         self._specie_indexer = count(0)
+        self._prepared_distances = {}
 
     def reset_specie_stats(self):
         raise NotImplementedError()
@@ -20,9 +25,70 @@ class Factory(object):
     def calc_specie_stats(self, generation, population_size, config):
         raise NotImplementedError()
 
+    def prepare(self, genomes, config):
+        """
+        Distances of genomes to the current representatives computed ahead of speciate, e.g. while the rest of the
+        population is still being evaluated. Genomes must not change until they are speciated. Relies on the species
+        and distance_engine of the implementing factory.
+        """
+        representatives = [specie.representative for specie in self.species.values()]
+        self.distance_engine.encode(list(genomes) + representatives)
+        distances = self.distance_engine.distances(genomes, representatives, config)
+        self.distance_engine.clear()
+        for genome, genome_distances in zip(genomes, distances):
+            self._prepared_distances[genome.id] = (genome, genome_distances)
+
+    def _previous_distances(self, genomes, config):
+        """
+        Distances of encoded genomes to the current representatives, reusing the ones computed by prepare
+        :return: Distance matrix shaped (len(genomes), len(species))
+        """
+        prepared, self._prepared_distances = self._prepared_distances, {}
+        representatives = [specie.representative for specie in self.species.values()]
+        distances = np.empty((len(genomes), len(representatives)))
+        missing = []
+        for row, genome in enumerate(genomes):
+            genome_prepared = prepared.get(genome.id)
+            if genome_prepared is not None and genome_prepared[0] is genome:
+                distances[row] = genome_prepared[1]
+            else:
+                missing.append(row)
+
+        if missing:
+            distances[missing] = self.distance_engine.distances([genomes[row] for row in missing], representatives,
+                                                                config)
+        return distances
+
     def speciate(self, population, generation, config):
         raise NotImplementedError()
 
+    def speciate_population(self, population, generation, population_size, config):
+        """
+        Normalizes the adjusted fitness of the population, speciates it and computes the statistics of its species
+        """
+        members_fitness = [member.fitness for member in population.values()]
+        min_fitness, max_fitness = min(members_fitness), max(members_fitness)
+        for member in population.values():
+            if min_fitness == max_fitness:
+                member.adjusted_fitness = 0.0
+            else:
+                member.adjusted_fitness = normalize(min_fitness, max_fitness, member.fitness, 0.0, 1.0)
+
+        self.speciate(population, generation, config)
+        self.reset_specie_stats()
+        self.sort_specie_genomes()
+        self.calc_best_stats()
+        self.calc_specie_stats(generation, population_size, config)
+
+    def add_member(self, genome, generation, config):
+        raise NotImplementedError()
+
+    def remove_member(self, genome_id):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
     def get_species_id(self, genome_id):
         raise NotImplementedError()
 
@@ -3,13 +3,13 @@ import random
 import numpy as np
 
 from evolving_networks.math_util import mean, probabilistic_round
+from evolving_networks.speciation.distance import DistanceEngine
 from evolving_networks.speciation.factory import Factory
-from evolving_networks.speciation.helpers import genomic_distance
 from evolving_networks.speciation.species import Species
 
 
 class Traditional(Factory):
-    def __init__(self):
+    def __init__(self, num_workers=1):
         super(Traditional, self).__init__()
         self.species = {}
         self._genome_to_species = {}
@@ -17,6 +17,7 @@ class Traditional(Factory):
         self.best_specie_idx = None
         self.min_specie_size = float('+Infinity')
         self.max_specie_size = float('-Infinity')
+        self.distance_engine = DistanceEngine(num_workers)
 
     def reset_specie_stats(self):
         for specie in self.species.values():
@@ -164,51 +165,52 @@ class Traditional(Factory):
         unspeciated = set(population.keys())
         compatibility_threshold = config.species.compatibility_threshold
 
+        # Distances of the population to previous representatives are computed as a single block
+        genomes = list(population.values())
+        genome_rows = {genome.id: row for row, genome in enumerate(genomes)}
+        self.distance_engine.encode(genomes + [specie.representative for specie in self.species.values()])
+        previous_distances = self._previous_distances(genomes, config)
+        previous_distances = dict(zip(self.species.keys(), previous_distances.T))
+
         # Uniform chance of electing fresh new representative
         species_election = [s_id for s_id in self.species.keys()]
 
         while len(species_election) > 0:
             s_id = random.choice(species_election)
-            specie = self.species[s_id]
-
-            specie_distances = []
-            for genome_id in unspeciated:
-                genome = population[genome_id]
-                d = genomic_distance(specie.representative, genome, config)
-                specie_distances.append((d, genome))
+            specie_distances = previous_distances[s_id]
 
-            _, new_representative = min(specie_distances, key=lambda x: x[0])
-            new_representative_id = new_representative.id
+            new_representative_id = min(unspeciated, key=lambda g_id: specie_distances[genome_rows[g_id]])
             representatives[s_id] = new_representative_id
             members[s_id] = [new_representative_id]
             unspeciated.remove(new_representative_id)
 
             species_election.remove(s_id)
 
+        # Distances of the population to current representatives, a column is added for every new specie
+        representative_ids = list(representatives.keys())
+        representative_distances = self.distance_engine.distances(
+            genomes, [population[representative_id] for representative_id in representatives.values()], config)
+
         while unspeciated:
             genome_id = unspeciated.pop()
-            genome = population[genome_id]
-
-            specie_distances = []
-            all_specie_distances = []
-            for s_id, representative_id in representatives.items():
-                representative = population[representative_id]
-                d = genomic_distance(representative, genome, config)
-                if d < compatibility_threshold:
-                    specie_distances.append((d, s_id))
-                all_specie_distances.append((d, s_id))
-
-            if specie_distances:
-                _, s_id = min(specie_distances, key=lambda x: x[0])
+            specie_distances = representative_distances[genome_rows[genome_id]]
+            is_compatible = specie_distances < compatibility_threshold
+
+            if np.any(is_compatible):
+                s_id = representative_ids[int(np.argmin(np.where(is_compatible, specie_distances, np.inf)))]
                 members[s_id].append(genome_id)
             elif len(representatives) >= config.species.specie_clusters:
-                _, s_id = min(all_specie_distances, key=lambda x: x[0])
+                s_id = representative_ids[int(np.argmin(specie_distances))]
                 members[s_id].append(genome_id)
             else:
                 s_id = next(self._specie_indexer)
                 representatives[s_id] = genome_id
                 members[s_id] = [genome_id]
+                representative_ids.append(s_id)
+                new_distances = self.distance_engine.distances(genomes, [population[genome_id]], config)
+                representative_distances = np.hstack((representative_distances, new_distances))
 
+        self.distance_engine.clear()
         self._genome_to_species = {}
         for s_id, representative_id in representatives.items():
             s = self.species.get(s_id)
@@ -224,6 +226,46 @@ class Traditional(Factory):
             s.members = specie_members
             self.species[s_id] = s
 
+    def add_member(self, genome, generation, config):
+        """
+        Speciates a single genome against current representatives, as speciate does for every genome
+        """
+        s_ids = list(self.species.keys())
+        specie_distances = np.array([genome.distance(self.species[s_id].representative, config) for s_id in s_ids])
+        is_compatible = specie_distances < config.species.compatibility_threshold
+
+        if np.any(is_compatible):
+            s_id = s_ids[int(np.argmin(np.where(is_compatible, specie_distances, np.inf)))]
+        elif len(s_ids) >= config.species.specie_clusters:
+            s_id = s_ids[int(np.argmin(specie_distances))]
+        else:
+            self._new_specie(genome, generation, config)
+            return
+
+        self.species[s_id].members.append(genome)
+        self._genome_to_species[genome.id] = s_id
+
+    def _new_specie(self, genome, generation, config):
+        s_id = next(self._specie_indexer)
+        s = Species(s_id, generation, config.species)
+        s.representative = genome
+        s.members = [genome]
+        self.species[s_id] = s
+        self._genome_to_species[genome.id] = s_id
+
+    def remove_member(self, genome_id):
+        s_id = self._genome_to_species.pop(genome_id, None)
+        specie = self.species.get(s_id)
+        if specie is None:
+            return
+
+        specie.members = [member for member in specie.members if member.id != genome_id]
+        if not specie.members:
+            del self.species[s_id]
+
+    def close(self):
+        self.distance_engine.close()
+
     def get_species_id(self, genome_id):
         return self._genome_to_species[genome_id]
 
@@ -3,13 +3,13 @@ import random
 import numpy as np
 
 from evolving_networks.math_util import mean, probabilistic_round
+from evolving_networks.speciation.distance import DistanceEngine
 from evolving_networks.speciation.factory import Factory
-from evolving_networks.speciation.helpers import genomic_distance
 from evolving_networks.speciation.species import Species
 
 
 class TraditionalFixed(Factory):
-    def __init__(self):
+    def __init__(self, num_workers=1):
         super(TraditionalFixed, self).__init__()
         self.species = {}
         self._genome_to_species = {}
@@ -17,6 +17,7 @@ class TraditionalFixed(Factory):
         self.best_specie_idx = None
         self.min_specie_size = float('+Infinity')
         self.max_specie_size = float('-Infinity')
+        self.distance_engine = DistanceEngine(num_workers)
 
     def reset_specie_stats(self):
         for specie in self.species.values():
@@ -162,31 +163,31 @@ class TraditionalFixed(Factory):
         # Speciate entire population
         unspeciated = set(population.keys())
 
+        # Distances of the population to previous representatives are computed as a single block
+        genomes = list(population.values())
+        genome_rows = {genome.id: row for row, genome in enumerate(genomes)}
+        self.distance_engine.encode(genomes + [specie.representative for specie in self.species.values()])
+        previous_distances = self._previous_distances(genomes, config)
+        previous_distances = dict(zip(self.species.keys(), previous_distances.T))
+
         # Uniform chance of electing fresh new representative
         species_election = [s_id for s_id in self.species.keys()]
 
         while len(species_election) > 0:
             s_id = random.choice(species_election)
-            specie = self.species[s_id]
-
-            specie_distances = []
-            for genome_id in unspeciated:
-                genome = population[genome_id]
-                d = genomic_distance(specie.representative, genome, config)
-                specie_distances.append((d, genome))
+            specie_distances = previous_distances[s_id]
 
-            _, new_representative = min(specie_distances, key=lambda x: x[0])
-            new_representative_id = new_representative.id
+            new_representative_id = min(unspeciated, key=lambda g_id: specie_distances[genome_rows[g_id]])
             representatives[s_id] = new_representative_id
             members[s_id] = [new_representative_id]
             unspeciated.remove(new_representative_id)
 
             species_election.remove(s_id)
 
+        representative_ids, representative_distances = None, None
         nb_members_per_species = max(int(len(population) / config.species.specie_clusters), int(len(population) * 0.2))
         while unspeciated:
             genome_id = random.choice(list(unspeciated))
-            genome = population[genome_id]
             unspeciated.remove(genome_id)
 
             if len(representatives) < config.species.specie_clusters:
@@ -194,18 +195,21 @@ class TraditionalFixed(Factory):
                 representatives[s_id] = genome_id
                 members[s_id] = [genome_id]
             else:
-                specie_distances = []
-                for s_id, representative_id in representatives.items():
-                    representative = population[representative_id]
-                    d = genomic_distance(representative, genome, config)
-                    specie_distances.append((d, s_id))
-
-                specie_distances = sorted(specie_distances, key=lambda x: x[0])
-                for _, s_id in specie_distances:
+                # Representatives are fixed from here on, distances to them are computed as a single block
+                if representative_distances is None:
+                    representative_ids = list(representatives.keys())
+                    representative_distances = self.distance_engine.distances(
+                        genomes, [population[representative_id] for representative_id in representatives.values()],
+                        config)
+
+                specie_distances = representative_distances[genome_rows[genome_id]]
+                for idx in np.argsort(specie_distances, kind='stable'):
+                    s_id = representative_ids[idx]
                     if len(members[s_id]) < nb_members_per_species:
                         members[s_id].append(genome_id)
                         break
 
+        self.distance_engine.clear()
         self._genome_to_species = {}
         for s_id, representative_id in representatives.items():
             s = self.species.get(s_id)
@@ -221,6 +225,49 @@ class TraditionalFixed(Factory):
             s.members = specie_members
             self.species[s_id] = s
 
+    def add_member(self, genome, generation, config):
+        """
+        Speciates a single genome into the closest specie below its share of members, as speciate does for every genome
+        """
+        if len(self.species) < config.species.specie_clusters:
+            self._new_specie(genome, generation, config)
+            return
+
+        population_size = sum(len(specie.members) for specie in self.species.values()) + 1
+        nb_members_per_species = max(int(population_size / config.species.specie_clusters), int(population_size * 0.2))
+        s_ids = list(self.species.keys())
+        specie_distances = np.array([genome.distance(self.species[s_id].representative, config) for s_id in s_ids])
+        order = np.argsort(specie_distances, kind='stable')
+        s_id = s_ids[order[0]]
+        for idx in order:
+            if len(self.species[s_ids[idx]].members) < nb_members_per_species:
+                s_id = s_ids[idx]
+                break
+
+        self.species[s_id].members.append(genome)
+        self._genome_to_species[genome.id] = s_id
+
+    def _new_specie(self, genome, generation, config):
+        s_id = next(self._specie_indexer)
+        s = Species(s_id, generation, config.species)
+        s.representative = genome
+        s.members = [genome]
+        self.species[s_id] = s
+        self._genome_to_species[genome.id] = s_id
+
+    def remove_member(self, genome_id):
+        s_id = self._genome_to_species.pop(genome_id, None)
+        specie = self.species.get(s_id)
+        if specie is None:
+            return
+
+        specie.members = [member for member in specie.members if member.id != genome_id]
+        if not specie.members:
+            del self.species[s_id]
+
+    def close(self):
+        self.distance_engine.close()
+
     def get_species_id(self, genome_id):
         return self._genome_to_species[genome_id]
 
@@ -0,0 +1,191 @@
+"""
+# ==============
+# References
+# ==============
+
+[1] http://nn.cs.utexas.edu/downloads/papers/stanley.ieeetec05.pdf
+
+"""
+
+import concurrent.futures
+
+from evolving_networks.genome.innovation import InnovationTracker
+from evolving_networks.math_util import mean, normalize, stat_functions
+
+
+class SteadyState(object):  # [1]
+    """
+    Steady state counterpart of Population replacing members one at a time instead of a generation at a time.
+    Off springs are evaluated through evaluator.submit (see ParallelEvaluator and SerialEvaluator), as soon as an
+    evaluation completes the off spring replaces the member with the lowest fitness shared within its specie and a new
+    off spring is bred and submitted, keeping max_pending evaluations in flight. Every population_size replacements
+    form a generation after which the population is speciated, specie statistics are computed, a new mating plan is
+    drawn and the regulation determines its mode.
+    """
+
+    def __init__(self, reproduction, speciation, regulation, reporter, max_pending=None):
+        self.reproduction = reproduction
+        self.speciation = speciation
+        self.regulation = regulation
+        self.reporter = reporter
+        self.max_pending = max_pending
+
+        self.config = None
+        self.evaluator = None
+        self.generation = 0
+        self.population = None
+        self.best_genome = None
+        self.population_size = 0
+        self.fitness_criterion = None
+        self.innovations = None
+        self.replacements = 0
+
+        # Off springs being evaluated keyed by their future, and parents of the next off springs
+        self.pending = {}
+        self._generation_plan = []
+        self._mating_plan = []
+
+    def initialize(self, evaluator, config):
+        self.config = config
+        self.evaluator = evaluator
+        self.population_size = config.neat.population_size
+        self.fitness_criterion = stat_functions.get(config.neat.fitness_criterion)
+        if self.fitness_criterion is None and not config.neat.no_fitness_termination:
+            raise RuntimeError('Unexpected fitness criterion [{}]'.format(config.neat.fitness_criterion))
+        if self.max_pending is None:
+            # Queued evaluations keep workers busy while the driver breeds the next off springs
+            self.max_pending = 2 * evaluator.num_workers
+
+        self.innovations = InnovationTracker(config.genome.innovation_retention, config.genome.innovation_archive_size)
+        self.reproduction.innovations = self.innovations
+
+        self.population = self.reproduction.populate(self.population_size, self.generation, config)
+        futures = {evaluator.submit(member, config): member for member in self.population.values()}
+        for future in concurrent.futures.as_completed(futures):
+            self._apply(futures[future], future)
+
+        for g_id in [g_id for g_id, member in self.population.items() if member.is_damaged]:
+            del self.population[g_id]
+
+        for member in self.population.values():
+            if self.best_genome is None or member.fitness > self.best_genome.fitness:
+                self.best_genome = member
+
+        self._next_generation()
+        self.generation += 1
+
+    def _apply(self, genome, future):
+        genome.fitness, genome.is_damaged = future.result()
+
+    def _next_generation(self):
+        self.speciation.speciate_population(self.population, self.generation, self.population_size, self.config)
+
+        # Species shrink and grow as members are replaced, parents are planned while specie statistics are current
+        self._generation_plan = self.reproduction.mating_plan(self.speciation.species, self.config)
+        self._mating_plan = []
+
+    def _is_member(self, genome):
+        return genome is None or self.population.get(genome.id) is genome
+
+    def _breed(self):
+        if not self._mating_plan:
+            self._mating_plan = [(parent_1, parent_2) for parent_1, parent_2 in self._generation_plan if
+                                 self._is_member(parent_1) and self._is_member(parent_2)]
+            self.reproduction.rng.shuffle(self._mating_plan)
+
+        # Parents replaced since the plan was drawn are skipped
+        parent_1, parent_2 = self.best_genome, None
+        while self._mating_plan:
+            entry = self._mating_plan.pop()
+            if self._is_member(entry[0]) and self._is_member(entry[1]):
+                parent_1, parent_2 = entry
+                break
+
+        genome = self.reproduction.breed(parent_1, parent_2, self.regulation, self.generation, self.config)
+        self.pending[self.evaluator.submit(genome, self.config)] = genome
+
+    def _worst_member(self):
+        members_fitness = [member.fitness for member in self.population.values()]
+        min_fitness, max_fitness = min(members_fitness), max(members_fitness)
+
+        worst, worst_fitness = None, float('+Infinity')
+        for g_id, member in self.population.items():
+            if member is self.best_genome:
+                continue
+
+            # Members of species purged for stagnation go first
+            specie = self.speciation.species.get(self.speciation.get_species_id(g_id))
+            if specie is None:
+                return member
+
+            fitness = 0.0 if min_fitness == max_fitness else normalize(min_fitness, max_fitness, member.fitness, 0.0,
+                                                                       1.0)
+            if fitness / len(specie) < worst_fitness:
+                worst, worst_fitness = member, fitness / len(specie)
+        return worst
+
+    def _replace(self, genome):
+        if len(self.population) >= self.population_size:
+            worst = self._worst_member()
+            self.speciation.remove_member(worst.id)
+            del self.population[worst.id]
+
+        self.population[genome.id] = genome
+        self.speciation.add_member(genome, self.generation, self.config)
+        if genome.fitness > self.best_genome.fitness:
+            self.best_genome = genome
+        self.replacements += 1
+
+    def _is_solved(self):
+        if self.config.neat.no_fitness_termination:
+            return False
+        return self.fitness_criterion([member.fitness for member in self.population.values()]) >= \
+            self.config.neat.fitness_threshold
+
+    def fit(self, n=None):
+        if self.config.neat.no_fitness_termination and (n is None):
+            raise RuntimeError('Cannot have no generational limit with no fitness termination')
+
+        # Evaluations completing together may overshoot a generation, the surplus counts for the next one
+        k, generation_replacements = 0, 0
+        while n is None or k < n:
+            k += 1
+            self.reporter.start_generation(self.generation)
+            self.innovations.next_generation()
+            self.reporter.pre_evaluation()
+            solved = False
+            while generation_replacements < self.population_size and not solved:
+                while len(self.pending) < self.max_pending:
+                    self._breed()
+
+                done, _ = concurrent.futures.wait(self.pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    genome = self.pending.pop(future)
+                    self._apply(genome, future)
+                    if genome.is_damaged:
+                        continue
+
+                    self._replace(genome)
+                    generation_replacements += 1
+
+                    # The criterion is checked when an off spring reaches the threshold and after every generation
+                    solved = solved or (genome.fitness >= self.config.neat.fitness_threshold and self._is_solved())
+            self.reporter.post_evaluation()
+
+            members_complexity = [member.complexity for member in self.population.values()]
+            self.reporter.pre_speciation()
+            self._next_generation()
+            self.reporter.post_speciation(self.speciation, self.regulation, members_complexity)
+            generation_replacements -= self.population_size
+
+            if solved or self._is_solved():
+                break
+
+            self.regulation.determine_mode(mean_complexity=mean(members_complexity), generation=self.generation,
+                                           current_best=self.speciation.best_genome)
+            self.reporter.end_generation()
+            self.generation += 1
+
+        # Distance worker threads are started again by the next speciation
+        self.speciation.close()
+        return self.best_genome
@@ -0,0 +1,63 @@
+import os
+import random
+import time
+
+import numpy as np
+
+from evolving_networks.configurations.config import Config
+from evolving_networks.genome.genome import Genome
+from evolving_networks.genome.innovation import InnovationTracker
+from evolving_networks.speciation.distance import DistanceEngine
+
+population_size = 2000
+nb_representatives = 40
+nb_mutations = 60
+nb_repeats = 5
+
+
+class Regulation(object):
+    node_add_rate = 0.3
+    node_delete_rate = 0.05
+    conn_add_rate = 0.6
+    conn_delete_rate = 0.05
+
+
+def main():
+    random.seed(0)
+    np.random.seed(0)
+    config = Config()
+    config.initialize('../xor/config/config_1.ini')
+
+    innovations = InnovationTracker()
+    genomes = []
+    for g_id in range(population_size):
+        genome = Genome(g_id, 0, config.genome, innovations)
+        genome.initialize(config.node, config.connection)
+        for _ in range(nb_mutations):
+            genome.mutate(Regulation(), config)
+        genomes.append(genome)
+    representatives = random.sample(genomes, nb_representatives)
+    print("{0} genomes, {1} representatives, {2} innovations".format(len(genomes), len(representatives),
+                                                                     len(innovations)))
+
+    serial_distances, serial_time = None, None
+    num_workers = 1
+    while num_workers <= os.cpu_count():
+        engine = DistanceEngine(num_workers)
+        engine.encode(genomes + representatives)
+        start_time = time.time()
+        for _ in range(nb_repeats):
+            distances = engine.distances(genomes, representatives, config)
+        elapsed_time = (time.time() - start_time) / nb_repeats
+        engine.close()
+
+        if serial_distances is None:
+            serial_distances, serial_time = distances, elapsed_time
+        assert np.array_equal(distances, serial_distances)
+        print("{0} workers: {1:.4f} sec speedup {2:.2f}x".format(num_workers, elapsed_time,
+                                                                 serial_time / elapsed_time))
+        num_workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,6 @@
 [2] https://gym.openai.com/envs/CartPole-v1/
 
 """
-import concurrent.futures
 import time
 
 import gym
@@ -15,6 +14,7 @@ import gym
 from evolving_networks.activations import Activations
 from evolving_networks.aggregations import Aggregations
 from evolving_networks.configurations.config import Config
+from evolving_networks.evaluation.parallel import ParallelEvaluator
 from evolving_networks.math_util import mean
 from evolving_networks.phenome.feed_forward import FeedForwardNetwork
 from evolving_networks.population import Population
@@ -26,28 +26,7 @@ from evolving_networks.speciation.traditional import Traditional as TraditionalS
 gym.logger.set_level(40)
 
 
-class ParallelEvaluator(object):
-    def __init__(self, num_workers, eval_function):
-        self.evaluations = 0
-        self.num_workers = num_workers
-        self.eval_function = eval_function
-
-    def evaluate(self, genomes, config):
-        max_fitness = float('-Infinity')
-        process_data = [(g_id, genome, config) for g_id, genome in genomes]
-        with concurrent.futures.ProcessPoolExecutor() as executor:  # [1]
-            for fitness, (g_id, genome) in zip(executor.map(self.eval_function, process_data), genomes):
-
-                if fitness > max_fitness:
-                    max_fitness = fitness
-
-                genome.fitness = fitness
-
-        self.evaluations += 1
-
-
-def evaluate(attributes):
-    g_id, genome, config = attributes
+def evaluate(genome, config):
     network = FeedForwardNetwork(genome, config)
     network.initialize(Activations(), Aggregations())
 
@@ -81,6 +60,7 @@ def main():
     parallel_evaluator = ParallelEvaluator(num_workers=4, eval_function=evaluate)
     population.initialize(parallel_evaluator.evaluate, config)
     population.fit()
+    parallel_evaluator.close()
     best_genome = population.best_genome
     print(best_genome)
 
@@ -7,13 +7,12 @@
 [2] https://gym.openai.com/envs/CartPole-v1/
 
 """
-import concurrent.futures
-
 import gym
 
 from evolving_networks.activations import Activations
 from evolving_networks.aggregations import Aggregations
 from evolving_networks.configurations.config import Config
+from evolving_networks.evaluation.parallel import ParallelEvaluator
 from evolving_networks.math_util import mean
 from evolving_networks.phenome.feed_forward import FeedForwardNetwork
 from evolving_networks.population import Population
@@ -25,22 +24,7 @@ from evolving_networks.speciation.traditional_fixed import TraditionalFixed as T
 gym.logger.set_level(40)
 
 
-class ParallelEvaluator(object):
-    def __init__(self, num_workers, eval_function):
-        self.evaluations = 0
-        self.num_workers = num_workers
-        self.eval_function = eval_function
-
-    def evaluate(self, genomes, config):
-        process_data = [(g_id, genome, config) for g_id, genome in genomes]
-        with concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers) as executor:  # [1]
-            for fitness, (g_id, genome) in zip(executor.map(self.eval_function, process_data), genomes):
-                genome.fitness = fitness
-        self.evaluations += 1
-
-
-def evaluate(attributes):
-    g_id, genome, config = attributes
+def evaluate(genome, config):
     network = FeedForwardNetwork(genome, config)
     network.initialize(Activations(), Aggregations())
 
@@ -107,6 +91,7 @@ def main():
 
         if fitness_reward >= config.neat.fitness_threshold:
             break
+    parallel_evaluator.close()
 
 
 if __name__ == "__main__":
@@ -7,11 +7,10 @@
 [2] https://gym.openai.com/envs/CartPole-v1/
 
 """
-import concurrent.futures
-
 import gym
 
 from evolving_networks.configurations.config import Config
+from evolving_networks.evaluation.parallel import ParallelEvaluator
 # from evolving_networks.pytorch.phenome.feed_forward import FeedForwardNetwork
 from evolving_networks.phenome.recurrent import RecurrentNetwork
 from evolving_networks.population import Population
@@ -26,20 +25,7 @@ from evolving_networks.speciation.traditional_fixed import TraditionalFixed as T
 gym.logger.set_level(40)
 
 
-class ParallelEvaluator(object):
-    def __init__(self, num_workers, eval_function):
-        self.num_workers = num_workers
-        self.eval_function = eval_function
-
-    def evaluate(self, genomes, config):
-        process_data = [(g_id, genome, config) for g_id, genome in genomes]
-        with concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers) as executor:  # [1]
-            for fitness, (g_id, genome) in zip(executor.map(self.eval_function, process_data), genomes):
-                genome.fitness = fitness
-
-
-def evaluate(attributes):
-    g_id, genome, config = attributes
+def evaluate(genome, config):
     network = RecurrentNetwork(genome, config)
     network.initialize(Activations(), Aggregations())
 
@@ -73,6 +59,7 @@ def main():
     parallel_evaluator = ParallelEvaluator(num_workers=4, eval_function=evaluate)
     population.initialize(parallel_evaluator.evaluate, config)
     population.fit()
+    parallel_evaluator.close()
     best_genome = population.best_genome
     print(best_genome)
 
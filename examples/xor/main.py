@@ -1,9 +1,9 @@
 from datetime import datetime
 
-from evolving_networks.activations import Activations
-from evolving_networks.aggregations import Aggregations
+import numpy as np
+
 from evolving_networks.configurations.config import Config
-from evolving_networks.phenome.feed_forward import FeedForwardNetwork
+from evolving_networks.evaluation.batched import BatchedEvaluator
 from evolving_networks.population import Population
 from evolving_networks.regulations.blended import Blended as BlendedComplexityRegulation
 from evolving_networks.reporting import reporter, stdout, statistics
@@ -25,7 +25,8 @@ def main():
     reporting_factory.add_report(stdout.StdOut())
     reporting_factory.add_report(statistics.Statistics())
     population = Population(reproduction_factory, speciation_factory, regulation_factory, reporting_factory)
-    population.initialize(evaluate, config)
+    evaluator = BatchedEvaluator(xor_inputs, fitness)
+    population.initialize(evaluator.evaluate, config)
     population.fit()
     best_genome = population.best_genome
 
@@ -35,16 +36,8 @@ def main():
         f.write(best_genome.to_json())
 
 
-def evaluate(genomes, config):
-    for genome_id, genome in genomes:
-        genome.fitness = 4.0
-        network = FeedForwardNetwork(genome, config)
-        network.initialize(Activations(), Aggregations())
-        network.reset(hard=True)
-        for x, y in zip(xor_inputs, xor_outputs):
-            output = network.activate(x)
-            genome.fitness -= (output[0] - y[0]) ** 2
-            genome.is_damaged = network.is_damaged
+def fitness(outputs):
+    return 4.0 - np.sum((outputs - np.array(xor_outputs)) ** 2, axis=(1, 2))
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ setup(
     packages=['evolving_networks', 'evolving_networks/regulations', 'evolving_networks/reporting',
               'evolving_networks/speciation', 'evolving_networks/configurations', 'evolving_networks/genome',
               'evolving_networks/phenome', 'evolving_networks/reproduction', 'evolving_networks/genome/genes',
-              'evolving_networks/phenome/proteins'],
+              'evolving_networks/phenome/proteins', 'evolving_networks/evaluation'],
     install_requires=['numpy', 'tabulate'],
     url='https://turingequations.com',
     license='GNU GENERAL PUBLIC LICENSE 3',
@@ -0,0 +1,86 @@
+import unittest
+
+import numpy as np
+
+from evolving_networks.configurations.config import Config
+from evolving_networks.evaluation.batched import BatchedEvaluator
+from evolving_networks.evaluation.parallel import ParallelEvaluator
+from evolving_networks.genome.genome import Genome
+from evolving_networks.phenome.feed_forward import FeedForwardNetwork
+
+
+def weight_sum(genome, config):
+    return sum(c.weight for c in genome.connections.values()) + len(genome.nodes)
+
+
+class TestBatchedEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.genomes = []
+        for g_id in range(10):
+            genome = Genome(g_id, 0, self.config.genome)
+            genome.initialize(self.config.node, self.config.connection)
+            self.genomes.append((g_id, genome))
+
+    def test_activate(self):
+        inputs = np.random.uniform(-2.0, 2.0, (7, 3))
+        evaluator = BatchedEvaluator(inputs, lambda outputs: np.sum(outputs, axis=(1, 2)), chunk_size=3)
+        networks = []
+        for g_id, genome in self.genomes:
+            network = FeedForwardNetwork(genome, self.config)
+            network.initialize(evaluator.activations, evaluator.aggregations)
+            networks.append(network)
+
+        outputs, damaged = evaluator.activate(networks)
+        self.assertEqual(outputs.shape, (10, 7, 1))
+        self.assertFalse(damaged.any())
+        for network, output in zip(networks, outputs):
+            self.assertTrue(np.allclose(network.activate_batch(inputs), output))
+
+    def test_evaluate(self):
+        inputs = np.random.uniform(-2.0, 2.0, (4, 3))
+        evaluator = BatchedEvaluator(inputs, lambda outputs: np.sum(outputs, axis=(1, 2)))
+        evaluator.evaluate(self.genomes, self.config)
+        for g_id, genome in self.genomes:
+            network = FeedForwardNetwork(genome, self.config)
+            network.initialize(evaluator.activations, evaluator.aggregations)
+            self.assertAlmostEqual(genome.fitness, float(np.sum(network.activate_batch(inputs))))
+        self.assertEqual(evaluator.evaluations, 1)
+
+
+class TestParallelEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.genomes = []
+        for g_id in range(10):
+            genome = Genome(g_id, 0, self.config.genome)
+            genome.initialize(self.config.node, self.config.connection)
+            self.genomes.append((g_id, genome))
+
+    def test_compact(self):
+        (g_id, genome) = self.genomes[0]
+        decoded = Genome(None, None, self.config.genome).from_compact(genome.to_compact())
+        self.assertEqual(decoded.nodes, genome.nodes)
+        self.assertEqual(decoded.connections, genome.connections)
+        self.assertEqual(decoded.node_ids, genome.node_ids)
+        self.assertEqual(decoded.structural_fingerprint(), genome.structural_fingerprint())
+
+    def test_evaluate(self):
+        evaluator = ParallelEvaluator(num_workers=2, eval_function=weight_sum, chunk_size=3)
+        try:
+            evaluator.evaluate(self.genomes, self.config)
+            executor = evaluator._executor
+            evaluator.evaluate(self.genomes, self.config)
+            self.assertIs(evaluator._executor, executor)
+        finally:
+            evaluator.close()
+
+        for g_id, genome in self.genomes:
+            self.assertEqual(genome.fitness, weight_sum(genome, self.config))
+        self.assertEqual(evaluator.evaluations, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
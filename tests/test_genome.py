@@ -0,0 +1,277 @@
+import pickle
+import random
+import unittest
+
+import numpy as np
+
+from evolving_networks.configurations.config import Config
+from evolving_networks.genome.packed import PackedGenome
+from evolving_networks.genome.genome import Genome
+from evolving_networks.genome.innovation import InnovationTracker
+from evolving_networks.genome.mutation import mutate_parameters
+
+
+class Regulation(object):
+    node_add_rate = 0.3
+    node_delete_rate = 0.05
+    conn_add_rate = 0.6
+    conn_delete_rate = 0.05
+
+
+class TestGenome(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.genomes = []
+        for g_id in range(6):
+            genome = Genome(g_id, 0, self.config.genome)
+            genome.initialize(self.config.node, self.config.connection)
+            for _ in range(random.randint(0, 40)):
+                genome.mutate(Regulation(), self.config)
+            self.genomes.append(genome)
+
+    def test_distance(self):
+        for genome in self.genomes:
+            clone = Genome(None, None, self.config.genome)
+            clone.clone(genome)
+            self.assertEqual(genome.distance(clone, self.config), 0.0)
+
+        for genome_1 in self.genomes:
+            for genome_2 in self.genomes:
+                self.assertAlmostEqual(genome_1.distance(genome_2, self.config),
+                                       genome_2.distance(genome_1, self.config))
+                if not genome_1.connections or not genome_2.connections:
+                    continue
+
+                compared = genome_1._compare(genome_2, self.config.connection)
+                compared_vectorized = genome_1._compare_vectorized(genome_2, self.config.connection)
+                self.assertEqual(compared[:3], compared_vectorized[:3])
+                self.assertAlmostEqual(compared[3], compared_vectorized[3])
+
+    def test_mutate_add_connection(self):
+        # 3 inputs, 2 hidden and 1 output node
+        for feed_forward, nb_connectors in [(True, 12), (False, 18)]:
+            self.config.genome.feed_forward = feed_forward
+            genome = Genome(None, None, self.config.genome)
+            genome.initialize(self.config.node, self.config.connection)
+            while genome.mutate_add_connection(self.config):
+                pass
+
+            self.assertEqual(len(genome.connections), nb_connectors)
+            self.assertEqual(len(genome._connectors), nb_connectors)
+            for connection in genome.connections.values():
+                self.assertNotIn(connection.target_id, genome.node_ids['input'])
+
+    def test_adjacency(self):
+        for genome in self.genomes:
+            genome._adjacency()
+            for _ in range(20):
+                genome.mutate(Regulation(), self.config)
+
+            outgoing = {}
+            for source_id, target_id in genome._connectors:
+                outgoing.setdefault(source_id, set()).add(target_id)
+            self.assertEqual({n_id: targets for n_id, targets in genome._outgoing.items() if targets}, outgoing)
+
+            # Feed forward genomes stay acyclic
+            for source_id, target_id in genome._connectors:
+                self.assertNotIn(source_id, genome._descendants(target_id))
+
+    def test_clone(self):
+        for genome in self.genomes:
+            compact = genome.to_compact()
+            clone = Genome(None, None, self.config.genome)
+            clone.clone(genome)
+            for _ in range(10):
+                clone.mutate(Regulation(), self.config)
+
+            # Mutating the clone leaves the parent's shared genes untouched
+            self.assertEqual(genome.to_compact(), compact)
+            for c_id, connection in clone.connections.items():
+                if c_id not in clone._shared_connections:
+                    self.assertIsNot(connection, genome.connections.get(c_id))
+
+    def test_shared_genes(self):
+        # Genes are shared after cloning, writing through _own_* copies them in the genome written to only
+        genome = self.genomes[0]
+        compact = genome.to_compact()
+        clone = Genome(None, None, self.config.genome)
+        clone.clone(genome)
+        n_id, c_id = max(genome.nodes), next(iter(genome.connections))
+        self.assertIs(clone.connections[c_id], genome.connections[c_id])
+
+        clone._own_connection(c_id).weight += 1.0
+        clone._own_node(n_id).bias += 1.0
+        self.assertEqual(genome.to_compact(), compact)
+        self.assertIsNot(clone.connections[c_id], genome.connections[c_id])
+        self.assertIs(clone._own_connection(c_id), clone.connections[c_id])
+
+        genome._own_connection(c_id).weight -= 1.0
+        self.assertAlmostEqual(clone.connections[c_id].weight, genome.connections[c_id].weight + 2.0)
+
+    def test_mutate_parameters(self):
+        compacts = [genome.to_compact() for genome in self.genomes]
+        clones = []
+        for genome in self.genomes:
+            clone = Genome(None, None, self.config.genome)
+            clone.clone(genome)
+            clones.append(clone)
+
+        nb_nodes, nb_connections = mutate_parameters(clones, self.config, np.random.default_rng(0))
+        self.assertEqual([genome.to_compact() for genome in self.genomes], compacts)
+
+        changed_nodes, changed_connections = 0, 0
+        for genome, clone in zip(self.genomes, clones):
+            self.assertEqual(clone._connectors, genome._connectors)
+            for n_id, node in clone.nodes.items():
+                changed_nodes += node is not genome.nodes[n_id]
+            for c_id, connection in clone.connections.items():
+                changed_connections += connection is not genome.connections[c_id]
+                self.assertLessEqual(abs(connection.weight), self.config.connection.weight_max_value)
+        self.assertEqual((changed_nodes, changed_connections), (nb_nodes, nb_connections))
+
+
+class TestInnovationTracker(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+
+    def test_retention(self):
+        tracker = InnovationTracker('generation')
+        c_id = tracker.get(0, 3)
+        self.assertEqual(tracker.get(0, 3), c_id)
+        tracker.next_generation()
+        self.assertEqual(len(tracker), 0)
+        self.assertGreater(tracker.get(0, 3), c_id)
+
+        tracker = InnovationTracker('lru', max_size=2)
+        c_id = tracker.get(0, 3)
+        tracker.get(1, 3)
+        tracker.get(0, 3)
+        tracker.get(2, 3)
+        self.assertEqual(list(tracker.archive), [(0, 3), (2, 3)])
+        self.assertEqual(tracker.get(0, 3), c_id)
+
+    def test_merge(self):
+        tracker = InnovationTracker()
+        parent = Genome(0, 0, self.config.genome, tracker)
+        parent.initialize(self.config.node, self.config.connection)
+
+        offspring, forks = [], [tracker.fork(), tracker.fork()]
+        for g_id, fork in enumerate(forks * 3):
+            genome = Genome(g_id + 1, 1, self.config.genome, fork)
+            genome.crossover_asexual(parent)
+            for _ in range(5):
+                genome.mutate_add_connection(self.config)
+            offspring.append(genome)
+        self.assertEqual(len(tracker), len(parent.connections))
+
+        for idx, fork in enumerate(forks):
+            mapping = tracker.merge(fork.provisional())
+            for genome in offspring[idx::2]:
+                genome.remap_innovations(mapping)
+
+        connectors = {}
+        for genome in offspring:
+            for c_id, connection in genome.connections.items():
+                self.assertEqual(c_id, connection.id)
+                self.assertEqual(connectors.setdefault((connection.source_id, connection.target_id), c_id), c_id)
+        self.assertEqual(connectors, dict(tracker.archive))
+
+    def test_fork_size(self):
+        # Forks carry only id counters, connectors known to the tracker are resolved on merge
+        tracker = InnovationTracker()
+        fork_sizes = []
+        for source_id in range(1000):
+            tracker.get(source_id, source_id + 1)
+            if source_id in (9, 999):
+                fork_sizes.append(len(pickle.dumps(tracker.fork())))
+        self.assertEqual(fork_sizes[0], fork_sizes[1])
+
+        fork = tracker.fork()
+        known_id, new_id = fork.get(5, 6), fork.get(5, 7)
+        self.assertEqual(tracker.merge(fork.provisional()), {known_id: 5, new_id: 1000})
+
+    def test_from_json(self):
+        # Genomes loaded without a tracker number new connectors after their own connections
+        tracker = InnovationTracker()
+        for _ in range(20):
+            tracker.get(random.randint(0, 100), random.randint(0, 100))
+        genome = Genome(0, 0, self.config.genome, tracker)
+        genome.initialize(self.config.node, self.config.connection)
+        for _ in range(20):
+            genome.mutate(Regulation(), self.config)
+
+        loaded = Genome(None, None, self.config.genome).from_json(genome.to_json())
+        for _ in range(5):
+            loaded.mutate_add_node(self.config)
+            loaded.mutate_add_connection(self.config)
+        self.assertEqual(len(loaded.connections), len(loaded._connectors))
+        for c_id, connection in loaded.connections.items():
+            self.assertEqual(loaded.innovations.get(connection.source_id, connection.target_id), c_id)
+            if c_id not in genome.connections:
+                self.assertGreater(c_id, max(genome.connections))
+
+    def test_crossover(self):
+        # The same connector created in different generations keeps one connection in the offspring
+        tracker = InnovationTracker('generation')
+        parent_1 = Genome(0, 0, self.config.genome, tracker)
+        parent_1.initialize(self.config.node, self.config.connection)
+        tracker.next_generation()
+        parent_2 = Genome(1, 0, self.config.genome, tracker)
+        parent_2.crossover_asexual(parent_1)
+        for connection in list(parent_2.connections.values()):
+            parent_2._remove_connector(connection.source_id, connection.target_id)
+            del parent_2.connections[connection.id]
+            parent_2._create_connection(connection.source_id, connection.target_id, connection.weight, True)
+        self.assertTrue(set(parent_1.connections).isdisjoint(parent_2.connections))
+
+        offspring = Genome(2, 1, self.config.genome, tracker)
+        offspring.crossover_sexual(parent_1, parent_2, self.config)
+        self.assertEqual(len(offspring.connections), len(offspring._connectors))
+        self.assertLessEqual(offspring._connectors, parent_1._connectors)
+
+
+class TestPackedGenome(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.genomes = []
+        for g_id in range(6):
+            genome = Genome(g_id, 0, self.config.genome)
+            genome.initialize(self.config.node, self.config.connection)
+            for _ in range(random.randint(0, 40)):
+                genome.mutate(Regulation(), self.config)
+            self.genomes.append(genome)
+
+    def test_conversion(self):
+        for genome in self.genomes:
+            packed_genome = PackedGenome(self.config.genome).from_genome(genome)
+            self.assertEqual(packed_genome.structural_fingerprint(), genome.structural_fingerprint())
+            self.assertEqual(packed_genome.parameter_fingerprint(), genome.parameter_fingerprint())
+            self.assertEqual(packed_genome.node_ids, genome.node_ids)
+            for c_id, connection in genome.connections.items():
+                self.assertEqual(packed_genome.connections[c_id].weight, connection.weight)
+                self.assertEqual(packed_genome.connections[c_id].enabled, connection.enabled)
+
+            converted = packed_genome.to_genome()
+            self.assertEqual(converted.nodes, genome.nodes)
+            self.assertEqual(converted.connections, genome.connections)
+
+    def test_views(self):
+        packed_genome = PackedGenome(self.config.genome).from_genome(self.genomes[0])
+        (c_id, connection) = next(iter(packed_genome.connections.items()))
+        connection.weight = 0.125
+        self.assertEqual(packed_genome.weights[0], 0.125)
+        self.assertEqual(packed_genome.copy().connections[c_id].weight, 0.125)
+
+    def test_distance(self):
+        packed_genomes = [PackedGenome(self.config.genome).from_genome(genome) for genome in self.genomes]
+        for genome_1, packed_genome_1 in zip(self.genomes, packed_genomes):
+            for genome_2, packed_genome_2 in zip(self.genomes, packed_genomes):
+                self.assertAlmostEqual(packed_genome_1.distance(packed_genome_2, self.config),
+                                       genome_1.distance(genome_2, self.config))
+
+
+if __name__ == '__main__':
+    unittest.main()
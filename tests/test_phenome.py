@@ -0,0 +1,174 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+from evolving_networks.activations import Activations
+from evolving_networks.aggregations import Aggregations
+from evolving_networks.configurations.config import Config
+from evolving_networks.genome.genes.connection import Connection
+from evolving_networks.genome.genome import Genome
+from evolving_networks.phenome.feed_forward import FeedForwardNetwork
+from evolving_networks.phenome.recurrent import RecurrentNetwork
+
+
+class Regulation(object):
+    node_add_rate = 0.3
+    node_delete_rate = 0.05
+    conn_add_rate = 0.6
+    conn_delete_rate = 0.05
+
+
+def reference_activate(genome, inputs, activations, aggregations):
+    """
+    Recursive evaluation of the outputs of an acyclic genome over its enabled connections
+    :return: Output values in ascending node id order and ids of the nodes they depend on
+    """
+    incoming = {}
+    for connection in genome.connections.values():
+        if connection.enabled:
+            incoming.setdefault(connection.target_id, []).append(connection)
+    values = dict(zip(sorted(genome.node_ids['input']), inputs))
+    required = set()
+
+    def value(n_id):
+        required.add(n_id)
+        if n_id not in values:
+            if n_id not in incoming:
+                values[n_id] = 0.0
+            else:
+                node = genome.nodes[n_id]
+                signals = [value(c.source_id) * c.weight for c in incoming[n_id]]
+                values[n_id] = activations.get(node.act)((aggregations.get(node.agg)(signals) * node.res) + node.bias)
+        return values[n_id]
+
+    return [value(n_id) for n_id in sorted(genome.node_ids['output'])], required
+
+
+class TestFeedForwardNetwork(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.genome = Genome(g_id=None, generation=None, config=self.config.genome)
+        self.genome.initialize(self.config.node, self.config.connection)
+
+    def test_activate(self):
+        network = FeedForwardNetwork(self.genome, self.config)
+        network.initialize(Activations(), Aggregations())
+        inputs = [0.5, -0.25, 1.5]
+
+        (output_id,) = self.genome.node_ids['output']
+        output_node = self.genome.nodes[output_id]
+        (connection,) = [c for c in self.genome.connections.values() if c.target_id == output_id]
+        signal = inputs[sorted(self.genome.node_ids['input']).index(connection.source_id)] * connection.weight
+        expected = 1.0 / (1.0 + math.exp(-1.0 * ((signal * output_node.res) + output_node.bias)))
+
+        self.assertAlmostEqual(network.activate(inputs)[0], expected)
+        self.assertFalse(network.is_damaged)
+
+    def test_reference(self):
+        # Outputs of evolved genomes match a recursive evaluation, including genomes with inputs off every output path
+        random.seed(0)
+        np.random.seed(0)
+        activations, aggregations = Activations(), Aggregations()
+        unused_inputs = 0
+        for g_id in range(100):
+            genome = Genome(g_id, 0, self.config.genome)
+            genome.initialize(self.config.node, self.config.connection)
+            for _ in range(random.randint(1, 40)):
+                genome.mutate(Regulation(), self.config)
+
+            network = FeedForwardNetwork(genome, self.config)
+            network.initialize(activations, aggregations)
+            for _ in range(3):
+                inputs = [random.uniform(-1.0, 1.0) for _ in range(self.config.genome.num_inputs)]
+                expected, required = reference_activate(genome, inputs, activations, aggregations)
+                np.testing.assert_allclose(network.activate(inputs), expected)
+            unused_inputs += not genome.node_ids['input'] <= required
+        self.assertGreater(unused_inputs, 0)
+
+    def test_activate_batch(self):
+        network = FeedForwardNetwork(self.genome, self.config)
+        network.initialize(Activations(), Aggregations())
+        inputs = np.random.uniform(-2.0, 2.0, (5, 3))
+
+        outputs = network.activate_batch(inputs)
+        self.assertEqual(outputs.shape, (5, 1))
+        for row, output in zip(inputs, outputs):
+            self.assertAlmostEqual(network.activate(row.tolist())[0], output[0])
+
+    def test_plan_cache(self):
+        FeedForwardNetwork.plan_cache.clear()
+        network = FeedForwardNetwork(self.genome, self.config)
+        network.initialize(Activations(), Aggregations())
+
+        compact = self.genome.to_compact()
+        clone = Genome(g_id=None, generation=None, config=self.config.genome)
+        clone.clone(self.genome)
+        for c_id in clone.connections:
+            clone._own_connection(c_id).weight += 1.0
+        self.assertEqual(self.genome.to_compact(), compact)
+        self.assertEqual(self.genome.structural_fingerprint(), clone.structural_fingerprint())
+
+        clone_network = FeedForwardNetwork(clone, self.config)
+        clone_network.initialize(Activations(), Aggregations())
+        self.assertEqual(FeedForwardNetwork.plan_cache.hits, 1)
+
+        inputs = [0.5, -0.25, 1.5]
+        outputs = clone_network.activate(inputs)
+        FeedForwardNetwork.plan_cache.clear()
+        clone_network.initialize(Activations(), Aggregations())
+        self.assertEqual(FeedForwardNetwork.plan_cache.misses, 1)
+        self.assertEqual(clone_network.activate(inputs), outputs)
+        self.assertNotEqual(network.activate(inputs), outputs)
+
+    def test_unexpected_inputs(self):
+        network = FeedForwardNetwork(self.genome, self.config)
+        network.initialize(Activations(), Aggregations())
+        with self.assertRaises(RuntimeError):
+            network.activate([0.0])
+
+
+class TestRecurrentNetwork(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.genome = Genome(g_id=None, generation=None, config=self.config.genome)
+        self.genome.initialize(self.config.node, self.config.connection)
+
+        # Self loop on the output node carries state between ticks
+        (output_id,) = self.genome.node_ids['output']
+        connection = Connection()
+        connection.initialize(max(self.genome.connections) + 1, output_id, output_id, 0.75, True)
+        self.genome.connections[connection.id] = connection
+
+    def test_activate_sequence(self):
+        network = RecurrentNetwork(self.genome, self.config)
+        network.initialize(Activations(), Aggregations())
+        inputs = np.random.uniform(-2.0, 2.0, (6, 3))
+
+        expected = [network.activate(row.tolist()) for row in inputs]
+        outputs = network.activate_sequence(inputs)
+        self.assertEqual(outputs.shape, (6, 1))
+        np.testing.assert_allclose(outputs, expected)
+
+        # Sequence state persists between calls until a hard reset
+        self.assertFalse(np.allclose(network.activate_sequence(inputs), expected))
+        network.reset(hard=True)
+        np.testing.assert_allclose(network.activate_sequence(inputs), expected)
+
+    def test_activate_sequence_batch(self):
+        network = RecurrentNetwork(self.genome, self.config)
+        network.initialize(Activations(), Aggregations())
+        inputs = np.random.uniform(-2.0, 2.0, (6, 4, 3))
+
+        outputs = network.activate_sequence_batch(inputs)
+        self.assertEqual(outputs.shape, (6, 4, 1))
+        for environment in range(4):
+            network.reset(hard=True)
+            np.testing.assert_allclose(network.activate_sequence(inputs[:, environment]), outputs[:, environment])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,324 @@
+import pickle
+import random
+import unittest
+
+import numpy as np
+
+from evolving_networks.configurations.config import Config
+from evolving_networks.evaluation.serial import SerialEvaluator
+from evolving_networks.genome.packed import PackedGenome
+from evolving_networks.islands import Islands
+from evolving_networks.pipeline import Pipeline
+from evolving_networks.population import Population
+from evolving_networks.regulations.phased import Phased
+from evolving_networks.reproduction import traditional
+from evolving_networks.reporting.report import Report
+from evolving_networks.reporting.reporter import Reporter
+from evolving_networks.reproduction.traditional import Traditional as TraditionalReproduction
+from evolving_networks.speciation.species import Species
+from evolving_networks.speciation.traditional import Traditional as TraditionalSpeciation
+from evolving_networks.steady_state import SteadyState
+
+
+def weight_sum(genomes, config):
+    for g_id, genome in genomes:
+        genome.fitness = sum(c.weight for c in genome.connections.values() if c.enabled)
+
+
+def genome_weight_sum(genome, config):
+    return sum(c.weight for c in genome.connections.values() if c.enabled)
+
+
+def island_population(island_idx, config, seed):
+    return Population(TraditionalReproduction(seed=seed), TraditionalSpeciation(), Phased(config), Reporter())
+
+
+class CacheReport(Report):
+    def __init__(self):
+        super(CacheReport, self).__init__()
+        self.statistics = []
+
+    def cache_statistics(self, name, hits, misses):
+        self.statistics.append((name, hits, misses))
+
+
+class TestPopulation(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.config.neat.no_fitness_termination = True
+
+    def _population(self, report):
+        reporter = Reporter()
+        reporter.add_report(report)
+        return Population(TraditionalReproduction(), TraditionalSpeciation(), Phased(self.config), reporter)
+
+    def test_fitness_memoization(self):
+        self.assertFalse(self.config.neat.fitness_memoization)
+        self.config.neat.fitness_memoization = True
+
+        report = CacheReport()
+        population = self._population(report)
+        population.initialize(weight_sum, self.config)
+        population.fit(3)
+
+        self.assertEqual(len(report.statistics), 3)
+        for name, hits, misses in report.statistics:
+            self.assertEqual(name, 'fitness')
+            self.assertGreater(hits, 0)
+            self.assertEqual(hits + misses, self.config.neat.population_size)
+
+        for member in population.population.values():
+            self.assertAlmostEqual(member.fitness, sum(c.weight for c in member.connections.values() if c.enabled))
+
+    def test_global_seed(self):
+        # Reproductions without a seed follow the global random states
+        populations = []
+        for _ in range(2):
+            random.seed(0)
+            np.random.seed(0)
+            population = self._population(CacheReport())
+            population.initialize(weight_sum, self.config)
+            population.fit(3)
+            populations.append(sorted(member.to_compact() for member in population.population.values()))
+        self.assertEqual(populations[0], populations[1])
+
+    def test_mating_plan(self):
+        population = self._population(CacheReport())
+        population.initialize(weight_sum, self.config)
+        species = population.speciation.species
+
+        plan = population.reproduction.mating_plan(species, self.config)
+        self.assertEqual(len(plan), sum(s.off_spring_asexual + s.off_spring_sexual for s in species.values()))
+        for parent_1, parent_2 in plan:
+            self.assertIsNot(parent_1, parent_2)
+
+    def _mating_species(self, species_data):
+        species = {}
+        for s_id, members_fitness, asexual, sexual in species_data:
+            specie = Species(s_id, 0, self.config.species)
+            specie.members = ['{}-{}'.format(s_id, m_idx) for m_idx in range(len(members_fitness))]
+            specie.members_fitness = members_fitness
+            specie.survivors = len(members_fitness)
+            specie.off_spring_asexual, specie.off_spring_sexual = asexual, sexual
+            species[s_id] = specie
+        return species
+
+    def test_mating_plan_global_seed(self):
+        # Parents of a reproduction without a seed follow the global numpy random state
+        self.config.species.inter_species_mating_rate = 0.25
+        species = self._mating_species([(1, [1.0, 2.0, 3.0, 4.0], 20, 40), (2, [1.0, 3.0], 0, 40)])
+        plans = []
+        for seed in (0, 0, 1):
+            np.random.seed(seed)
+            plans.append(TraditionalReproduction().mating_plan(species, self.config))
+        self.assertEqual(plans[0], plans[1])
+        self.assertNotEqual(plans[0], plans[2])
+
+    def test_mating_plan_distribution(self):
+        # Parents are drawn in proportion to fitness, partners without the first parent and inter species partners
+        # from the other species
+        self.config.species.inter_species_mating_rate = 0.25
+        species = self._mating_species([(1, [1.0, 2.0, 3.0, 4.0], 4000, 8000), (2, [1.0, 3.0], 0, 8000)])
+        p = {s_id: np.array(s.members_fitness) / sum(s.members_fitness) for s_id, s in species.items()}
+
+        plan = TraditionalReproduction(seed=0).mating_plan(species, self.config)
+        self.assertEqual(len(plan), 20000)
+
+        def frequencies(draws, members):
+            return np.array([draws.count(member) for member in members]) / max(len(draws), 1)
+
+        asexual = [p1 for p1, p2 in plan if p2 is None]
+        self.assertEqual(len(asexual), 4000)
+        np.testing.assert_allclose(frequencies(asexual, species[1].members), p[1], atol=0.02)
+
+        for s_id, s2_id in [(1, 2), (2, 1)]:
+            members, members_2 = species[s_id].members, species[s2_id].members
+            inter = [(p1, p2) for p1, p2 in plan if p1 in members and p2 in members_2]
+            self.assertAlmostEqual(len(inter) / species[s_id].off_spring_sexual, 0.25, delta=0.02)
+            np.testing.assert_allclose(frequencies([p1 for p1, _ in inter], members), p[s_id], atol=0.02)
+            np.testing.assert_allclose(frequencies([p2 for _, p2 in inter], members_2), p[s2_id], atol=0.02)
+
+            intra = [(p1, p2) for p1, p2 in plan if p1 in members and p2 in members]
+            np.testing.assert_allclose(frequencies([p1 for p1, _ in intra], members), p[s_id], atol=0.02)
+            for m_idx, member in enumerate(members):
+                partners = [p2 for p1, p2 in intra if p1 == member]
+                expected = p[s_id].copy()
+                expected[m_idx] = 0.0
+                np.testing.assert_allclose(frequencies(partners, members), expected / np.sum(expected), atol=0.03)
+
+    def test_parallel_reproduction(self):
+        # Seeded off spring construction gives the same population on any number of workers
+        populations = []
+        for num_workers, chunk_size in [(1, None), (2, 7)]:
+            random.seed(0)
+            np.random.seed(0)
+            reproduction = TraditionalReproduction(seed=0, num_workers=num_workers, chunk_size=chunk_size)
+            population = Population(reproduction, TraditionalSpeciation(), Phased(self.config), Reporter())
+            try:
+                population.initialize(weight_sum, self.config)
+                population.fit(2)
+            finally:
+                reproduction.close()
+            populations.append(sorted(member.to_compact() for member in population.population.values()))
+        self.assertEqual(populations[0], populations[1])
+
+    def test_parallel_reproduction_payload(self):
+        # Chunks sent to workers do not grow with the innovation archive
+        chunk_sizes = []
+        build_off_springs = traditional._build_off_springs
+
+        def recorded_build_off_springs(*chunk, config):
+            chunk_sizes.append(len(pickle.dumps(chunk)))
+            return build_off_springs(*chunk, config=config)
+
+        traditional._build_off_springs = recorded_build_off_springs
+        try:
+            for archive_size in (0, 10000):
+                random.seed(0)
+                np.random.seed(0)
+                reproduction = TraditionalReproduction(seed=0, num_workers=1)
+                population = Population(reproduction, TraditionalSpeciation(), Phased(self.config), Reporter())
+                population.initialize(weight_sum, self.config)
+                for source_id in range(archive_size):
+                    population.innovations.get(-source_id - 1, 0)
+                population.fit(1)
+        finally:
+            traditional._build_off_springs = build_off_springs
+        self.assertEqual(chunk_sizes[:len(chunk_sizes) // 2], chunk_sizes[len(chunk_sizes) // 2:])
+
+    def test_packed_storage(self):
+        # Members are kept packed by every reproduction path and evolve as genomes do
+        self.config.genome.storage = 'packed'
+        self.config.neat.fitness_memoization = True
+        reproductions = [TraditionalReproduction(), TraditionalReproduction(seed=0, num_workers=1)]
+        drivers = [Population(reproduction, TraditionalSpeciation(), Phased(self.config), Reporter()) for
+                   reproduction in reproductions]
+        drivers.append(Pipeline(TraditionalReproduction(), TraditionalSpeciation(), Phased(self.config), Reporter(),
+                                prepare_size=16))
+        for driver in drivers:
+            driver.initialize(SerialEvaluator(genome_weight_sum) if isinstance(driver, Pipeline) else weight_sum,
+                              self.config)
+            driver.fit(3)
+            if not isinstance(driver, Pipeline):
+                driver.immigrate([member.to_compact() for member in list(drivers[0].population.values())[:3]])
+                driver.fit(1)
+
+            self.assertEqual(len(driver.population), self.config.neat.population_size)
+            for g_id, member in driver.population.items():
+                self.assertIsInstance(member, PackedGenome)
+                self.assertAlmostEqual(member.fitness, genome_weight_sum(member, self.config))
+                self.assertIn(member, driver.speciation.get_species(g_id).members)
+                for c_id, connection in member.connections.items():
+                    self.assertEqual(driver.innovations.get(connection.source_id, connection.target_id), c_id)
+
+    def test_steady_state(self):
+        steady_state = SteadyState(TraditionalReproduction(seed=0), TraditionalSpeciation(), Phased(self.config),
+                                   Reporter(), max_pending=3)
+        steady_state.initialize(SerialEvaluator(genome_weight_sum), self.config)
+        best_genome = steady_state.fit(3)
+
+        self.assertGreaterEqual(steady_state.replacements, 3 * self.config.neat.population_size)
+        self.assertEqual(len(steady_state.population), self.config.neat.population_size)
+        for g_id, member in steady_state.population.items():
+            self.assertIn(member, steady_state.speciation.get_species(g_id).members)
+            self.assertGreaterEqual(best_genome.fitness, member.fitness)
+
+    def test_steady_state_parents(self):
+        # Off springs are only bred from current members, planned parents replaced in the meantime are skipped
+        reproduction = TraditionalReproduction(seed=0)
+        steady_state = SteadyState(reproduction, TraditionalSpeciation(), Phased(self.config), Reporter(),
+                                   max_pending=3)
+        steady_state.initialize(SerialEvaluator(genome_weight_sum), self.config)
+
+        breed, replaced_parents = reproduction.breed, []
+
+        def checked_breed(parent_1, parent_2, regulation, generation, config):
+            for parent in (parent_1, parent_2):
+                if parent is not None and steady_state.population.get(parent.id) is not parent:
+                    replaced_parents.append(parent)
+            return breed(parent_1, parent_2, regulation, generation, config)
+
+        reproduction.breed = checked_breed
+        steady_state.fit(10)
+        self.assertEqual(replaced_parents, [])
+
+    def test_pipeline(self):
+        self.config.neat.fitness_memoization = True
+        report = CacheReport()
+        reporter = Reporter()
+        reporter.add_report(report)
+        pipeline = Pipeline(TraditionalReproduction(), TraditionalSpeciation(), Phased(self.config), reporter,
+                            prepare_size=16)
+        pipeline.initialize(SerialEvaluator(genome_weight_sum), self.config)
+        pipeline.fit(3)
+
+        self.assertEqual([hits + misses for name, hits, misses in report.statistics if name == 'fitness'],
+                         [self.config.neat.population_size] * 3)
+        for g_id, member in pipeline.population.items():
+            self.assertAlmostEqual(member.fitness, genome_weight_sum(member, self.config))
+            self.assertIn(member, pipeline.speciation.get_species(g_id).members)
+
+        # Distances prepared ahead of speciation match the ones speciate computes
+        speciation, genomes = pipeline.speciation, list(pipeline.population.values())
+        speciation.distance_engine.encode(genomes + [s.representative for s in speciation.species.values()])
+        distances = speciation._previous_distances(genomes, self.config)
+        speciation.prepare(genomes[::2], self.config)
+        speciation.distance_engine.encode(genomes + [s.representative for s in speciation.species.values()])
+        np.testing.assert_allclose(speciation._previous_distances(genomes, self.config), distances)
+
+    def test_immigrate(self):
+        populations = [self._population(CacheReport()) for _ in range(2)]
+        for population in populations:
+            population.initialize(weight_sum, self.config)
+            population.fit(2)
+
+        emigrants = sorted(populations[0].population.values(), reverse=True)[:3]
+        population = populations[1]
+        population.immigrate([emigrant.to_compact() for emigrant in emigrants])
+        population.fit(1)
+
+        self.assertEqual(len(population.population), self.config.neat.population_size)
+        for g_id, member in population.population.items():
+            self.assertIn(member, population.speciation.get_species(g_id).members)
+            for c_id, connection in member.connections.items():
+                self.assertEqual(population.innovations.get(connection.source_id, connection.target_id), c_id)
+
+    def test_immigrate_before_fit(self):
+        populations = [self._population(CacheReport()) for _ in range(2)]
+        for population in populations:
+            population.initialize(weight_sum, self.config)
+
+        population = populations[1]
+        self.assertIsNotNone(population.best_genome)
+        population.immigrate([member.to_compact() for member in list(populations[0].population.values())[:3]])
+        self.assertEqual(len(population.population), self.config.neat.population_size)
+        self.assertIn(population.best_genome, population.population.values())
+
+    def test_islands(self):
+        islands = Islands(island_population, num_islands=2, migration_interval=2, migration_size=2)
+        try:
+            islands.initialize(weight_sum, self.config, seed=0)
+            best_genome = islands.fit(5)
+        finally:
+            islands.close()
+
+        self.assertEqual((islands.generation, islands.migrations), (5, 2))
+        self.assertAlmostEqual(best_genome.fitness, sum(c.weight for c in best_genome.connections.values() if
+                                                        c.enabled))
+
+    def test_islands_seed(self):
+        # Seeded islands evolve the same populations on every run
+        best_genomes = []
+        for _ in range(2):
+            islands = Islands(island_population, num_islands=2, migration_interval=2, migration_size=2)
+            try:
+                islands.initialize(weight_sum, self.config, seed=0)
+                best_genomes.append(islands.fit(5).to_compact())
+            finally:
+                islands.close()
+        self.assertEqual(best_genomes[0], best_genomes[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
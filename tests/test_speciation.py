@@ -0,0 +1,58 @@
+import random
+import unittest
+
+import numpy as np
+
+from evolving_networks.configurations.config import Config
+from evolving_networks.genome.genome import Genome
+from evolving_networks.speciation.distance import DistanceEngine
+
+
+class Regulation(object):
+    node_add_rate = 0.3
+    node_delete_rate = 0.05
+    conn_add_rate = 0.6
+    conn_delete_rate = 0.05
+
+
+class TestDistanceEngine(unittest.TestCase):
+    def setUp(self):
+        self.config = Config()
+        self.config.initialize('test_persistence_1.ini')
+        self.genomes = []
+        for g_id in range(12):
+            genome = Genome(g_id, 0, self.config.genome)
+            genome.initialize(self.config.node, self.config.connection)
+            for _ in range(random.randint(0, 40)):
+                genome.mutate(Regulation(), self.config)
+            self.genomes.append(genome)
+
+        # Genome without connections
+        self.genomes.append(Genome(12, 0, self.config.genome))
+
+    def test_distances(self):
+        engine = DistanceEngine()
+        engine.encode(self.genomes)
+        distances = engine.distances(self.genomes, self.genomes[::2], self.config)
+        self.assertEqual(distances.shape, (13, 7))
+
+        expected = [[genome_1.distance(genome_2, self.config) for genome_2 in self.genomes[::2]] for genome_1 in
+                    self.genomes]
+        self.assertTrue(np.allclose(distances, expected))
+
+    def test_num_workers(self):
+        engine = DistanceEngine()
+        engine.encode(self.genomes)
+        distances = engine.distances(self.genomes, self.genomes[::2], self.config)
+
+        parallel_engine = DistanceEngine(num_workers=3)
+        parallel_engine.min_chunk_size = 2
+        parallel_engine.encode(self.genomes)
+        self.assertTrue(np.array_equal(parallel_engine.distances(self.genomes, self.genomes[::2], self.config),
+                                       distances))
+        parallel_engine.close()
+        self.assertIsNone(parallel_engine._executor)
+
+
+if __name__ == '__main__':
+    unittest.main()